@@ -31,6 +31,7 @@ OPTIONAL_FILES=(
     "triangle_topo.py"
     "traffic_generator.py"
     "run_rule_tests.sh"
+    "export_native_model.py"
 )
 
 echo -e "${BLUE}Checking required files...${NC}"
@@ -6,19 +6,102 @@ Compares Rule-based vs ML-based SDN controller performance
 Generates comparison reports for research analysis
 """
 
+import argparse
+import concurrent.futures
+import functools
+import hashlib
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
+import multiprocessing
 import os
 import sys
 from datetime import datetime
+from operator import itemgetter
+from statistics import StatisticsError, fmean
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:  # orjson is optional; stdlib json parses the same files
+    _json_loads = json.loads
+    
+    def _json_dumps(obj):
+        return json.dumps(obj, indent=2).encode()
+
+LATENCY_COLUMNS = ['avg_latency_ms', 'jitter_ms', 'packet_loss_percent']
+_RESPONSE_TIME = itemgetter('avg_response_time_ms')
+
+@functools.lru_cache(maxsize=None)
+def _load_json(path):
+    """Load and memoize a result file by path"""
+    with open(path, 'rb') as f:
+        return _json_loads(f.read())
+
+def _soa(records, columns):
+    """Struct-of-arrays view of result records: one float array per column"""
+    # A single itemgetter pulls every column of a record in one C call
+    rows = np.array(list(map(itemgetter(*columns), records)), dtype=np.float64)
+    rows = rows.reshape(-1, len(columns))
+    return {c: rows[:, i] for i, c in enumerate(columns)}
+
+def _plot_latency_chart(data_to_plot, labels, out_path):
+    """Render the latency box plot to out_path"""
+    import matplotlib.pyplot as plt
+    
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.boxplot(data_to_plot, labels=labels)
+    ax.set_ylabel('Latency (ms)')
+    ax.set_title('Latency Performance Comparison: Rule-based vs ML-enhanced')
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=300)
+    plt.close(fig)
+    return out_path
+
+def _plot_throughput_chart(approaches, averages, out_path):
+    """Render the average throughput bar chart to out_path"""
+    import matplotlib.pyplot as plt
+    
+    fig, ax = plt.subplots(figsize=(12, 6))
+    bars = ax.bar(approaches, averages, color=['lightcoral', 'lightblue'])
+    ax.set_ylabel('Average Throughput (Mbps)')
+    ax.set_title('Average Throughput Comparison: Rule-based vs ML-enhanced')
+    ax.set_ylim(0, max(averages) * 1.1 if averages else 100)
+    
+    # Add value labels on bars
+    ax.bar_label(bars, labels=[f'{avg:.1f} Mbps' for avg in averages], padding=3)
+    
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=300)
+    plt.close(fig)
+    return out_path
+
+def _plot_qos_chart(data_to_plot, positions, labels, out_path):
+    """Render the QoS response time box plot to out_path"""
+    import matplotlib.pyplot as plt
+    
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.boxplot(data_to_plot, positions=positions, labels=labels)
+    ax.set_ylabel('QoS Response Time (ms)')
+    ax.set_title('QoS Performance Comparison: Rule-based vs ML-enhanced')
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=300)
+    plt.close(fig)
+    return out_path
 
 class PerformanceComparator:
     def __init__(self):
         self.rule_based_dir = "rule_based_results"
         self.ml_based_dir = "ml_based_results"  # Updated to match ML tester output
         self.comparison_dir = "comparison_results"
+        self.cache_file = os.path.join(self.comparison_dir, ".cache_fp")
+        self._rule_cache = None
+        self._ml_cache = None
         self.setup_directories()
     
     def setup_directories(self):
@@ -28,6 +111,9 @@ class PerformanceComparator:
     
     def load_rule_based_results(self):
         """Load rule-based performance results"""
+        if self._rule_cache is not None:
+            return self._rule_cache
+        
         results = {}
         
         if not os.path.exists(self.rule_based_dir):
@@ -35,18 +121,22 @@ class PerformanceComparator:
             return results
         
         # Find most recent results
-        json_files = [f for f in os.listdir(self.rule_based_dir) if f.endswith('.json')]
+        chosen = {}
+        with os.scandir(self.rule_based_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.json'):
+                    chosen.setdefault('_'.join(entry.name.split('_', 2)[:2]), entry.path)
         
-        for json_file in json_files:
-            test_type = json_file.split('_')[0] + '_' + json_file.split('_')[1]
-            if test_type not in results:
-                with open(os.path.join(self.rule_based_dir, json_file), 'r') as f:
-                    results[test_type] = json.load(f)
+        results = {test_type: _load_json(path) for test_type, path in chosen.items()}
         
+        self._rule_cache = results
         return results
     
     def load_ml_based_results(self):
         """Load ML-based performance results"""
+        if self._ml_cache is not None:
+            return self._ml_cache
+        
         results = {}
         
         if not os.path.exists(self.ml_based_dir):
@@ -54,9 +144,11 @@ class PerformanceComparator:
             return results
         
         # Find most recent ML results
-        json_files = [f for f in os.listdir(self.ml_based_dir) if f.endswith('.json')]
+        with os.scandir(self.ml_based_dir) as it:
+            json_entries = [e for e in it if e.is_file() and e.name.endswith('.json')]
         
-        for json_file in json_files:
+        for entry in json_entries:
+            json_file = entry.name
             # Parse ML result types
             if 'ml_enhanced_latency' in json_file:
                 test_type = 'ml_latency'
@@ -71,9 +163,9 @@ class PerformanceComparator:
             else:
                 continue
             
-            with open(os.path.join(self.ml_based_dir, json_file), 'r') as f:
-                results[test_type] = json.load(f)
+            results[test_type] = _load_json(entry.path)
         
+        self._ml_cache = results
         return results
     
     def compare_latency_performance(self, rule_results, ml_results):
@@ -89,27 +181,26 @@ class PerformanceComparator:
         
         # Extract rule-based latency data
         if 'baseline_latency' in rule_results:
-            rule_latencies = [r['avg_latency_ms'] for r in rule_results['baseline_latency']['results']]
-            rule_jitters = [r['jitter_ms'] for r in rule_results['baseline_latency']['results']]
-            rule_losses = [r['packet_loss_percent'] for r in rule_results['baseline_latency']['results']]
+            rule_cols = _soa(rule_results['baseline_latency']['results'], LATENCY_COLUMNS)
             
-            comparison['rule_based'] = {
-                'avg_latency_ms': sum(rule_latencies) / len(rule_latencies),
-                'avg_jitter_ms': sum(rule_jitters) / len(rule_jitters),
-                'avg_packet_loss_percent': sum(rule_losses) / len(rule_losses)
-            }
+            if rule_cols['avg_latency_ms'].size:
+                comparison['rule_based'] = {
+                    'avg_latency_ms': float(rule_cols['avg_latency_ms'].mean()),
+                    'avg_jitter_ms': float(rule_cols['jitter_ms'].mean()),
+                    'avg_packet_loss_percent': float(rule_cols['packet_loss_percent'].mean())
+                }
         
         # Extract ML-based latency data
         if 'ml_latency' in ml_results:
-            ml_latencies = [r['avg_latency_ms'] for r in ml_results['ml_latency']['results'] if r['avg_latency_ms'] > 0]
-            ml_jitters = [r['jitter_ms'] for r in ml_results['ml_latency']['results']]
-            ml_losses = [r['packet_loss_percent'] for r in ml_results['ml_latency']['results']]
+            ml_cols = _soa(ml_results['ml_latency']['results'], LATENCY_COLUMNS)
+            ml_latencies = ml_cols['avg_latency_ms']
+            measured = ml_latencies > 0
             
-            if ml_latencies:
+            if measured.any():
                 comparison['ml_based'] = {
-                    'avg_latency_ms': sum(ml_latencies) / len(ml_latencies),
-                    'avg_jitter_ms': sum(ml_jitters) / len(ml_jitters) if ml_jitters else 0,
-                    'avg_packet_loss_percent': sum(ml_losses) / len(ml_losses)
+                    'avg_latency_ms': float(ml_latencies.mean(where=measured)),
+                    'avg_jitter_ms': float(ml_cols['jitter_ms'].mean()),
+                    'avg_packet_loss_percent': float(ml_cols['packet_loss_percent'].mean())
                 }
         
         # Determine winner
@@ -137,23 +228,24 @@ class PerformanceComparator:
         
         # Extract rule-based throughput
         if 'throughput_performance' in rule_results:
-            rule_throughputs = [r['throughput_mbps'] for r in rule_results['throughput_performance']['results']]
-            rule_efficiency = [r['efficiency'] for r in rule_results['throughput_performance']['results']]
+            rule_cols = _soa(rule_results['throughput_performance']['results'],
+                             ['throughput_mbps', 'efficiency'])
             
-            comparison['rule_based'] = {
-                'avg_throughput_mbps': sum(rule_throughputs) / len(rule_throughputs),
-                'avg_efficiency_percent': sum(rule_efficiency) / len(rule_efficiency)
-            }
+            if rule_cols['throughput_mbps'].size:
+                comparison['rule_based'] = {
+                    'avg_throughput_mbps': float(rule_cols['throughput_mbps'].mean()),
+                    'avg_efficiency_percent': float(rule_cols['efficiency'].mean())
+                }
         
         # Extract ML-based throughput
         if 'ml_throughput' in ml_results:
-            ml_throughputs = [r['throughput_mbps'] for r in ml_results['ml_throughput']['results']]
-            ml_efficiency = [r['efficiency_percent'] for r in ml_results['ml_throughput']['results']]
+            ml_cols = _soa(ml_results['ml_throughput']['results'],
+                           ['throughput_mbps', 'efficiency_percent'])
             
-            if ml_throughputs:
+            if ml_cols['throughput_mbps'].size:
                 comparison['ml_based'] = {
-                    'avg_throughput_mbps': sum(ml_throughputs) / len(ml_throughputs),
-                    'avg_efficiency_percent': sum(ml_efficiency) / len(ml_efficiency)
+                    'avg_throughput_mbps': float(ml_cols['throughput_mbps'].mean()),
+                    'avg_efficiency_percent': float(ml_cols['efficiency_percent'].mean())
                 }
         
         # Determine winner
@@ -168,6 +260,18 @@ class PerformanceComparator:
         
         return comparison
     
+    def _priority_response_means(self, qos_results, priority_key):
+        """Return (high, low) mean response times, or None if either group is empty"""
+        # Only a handful of QoS scenarios, so stream them through fmean
+        # rather than paying for a DataFrame
+        try:
+            high_avg = fmean(r['avg_response_time_ms'] for r in qos_results if r[priority_key] == 'high')
+            low_avg = fmean(r['avg_response_time_ms'] for r in qos_results if r[priority_key] == 'low')
+        except StatisticsError:
+            return None
+        
+        return high_avg, low_avg
+    
     def compare_qos_performance(self, rule_results, ml_results):
         """Compare QoS performance"""
         print("\n=== QOS COMPARISON ===")
@@ -182,12 +286,10 @@ class PerformanceComparator:
         # Extract rule-based QoS data
         if 'qos_under' in rule_results:
             rule_qos = rule_results['qos_under']['results']
-            high_priority = [r for r in rule_qos if r['expected_priority'] == 'high']
-            low_priority = [r for r in rule_qos if r['expected_priority'] == 'low']
+            qos_means = self._priority_response_means(rule_qos, 'expected_priority')
             
-            if high_priority and low_priority:
-                high_avg = sum([r['avg_response_time_ms'] for r in high_priority]) / len(high_priority)
-                low_avg = sum([r['avg_response_time_ms'] for r in low_priority]) / len(low_priority)
+            if qos_means:
+                high_avg, low_avg = qos_means
                 
                 comparison['rule_based'] = {
                     'high_priority_response_ms': high_avg,
@@ -199,12 +301,10 @@ class PerformanceComparator:
         # Extract ML-based QoS data
         if 'ml_qos' in ml_results:
             ml_qos = ml_results['ml_qos']['results']
-            high_priority = [r for r in ml_qos if r['expected_ml_priority'] == 'high']
-            low_priority = [r for r in ml_qos if r['expected_ml_priority'] == 'low']
+            qos_means = self._priority_response_means(ml_qos, 'expected_ml_priority')
             
-            if high_priority and low_priority:
-                high_avg = sum([r['avg_response_time_ms'] for r in high_priority]) / len(high_priority)
-                low_avg = sum([r['avg_response_time_ms'] for r in low_priority]) / len(low_priority)
+            if qos_means:
+                high_avg, low_avg = qos_means
                 
                 comparison['ml_based'] = {
                     'high_priority_response_ms': high_avg,
@@ -223,11 +323,10 @@ class PerformanceComparator:
         
         return comparison
     
-    def generate_comparison_report(self, rule_results, ml_results):
+    def generate_comparison_report(self, rule_results, ml_results, timestamp, generated_at):
         """Generate comprehensive comparison report"""
         print("\n=== GENERATING COMPARISON REPORT ===")
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_file = f"{self.comparison_dir}/performance_comparison_{timestamp}.txt"
         
         # Perform comparisons
@@ -235,160 +334,158 @@ class PerformanceComparator:
         throughput_comp = self.compare_throughput_performance(rule_results, ml_results)
         qos_comp = self.compare_qos_performance(rule_results, ml_results)
         
-        with open(report_file, 'w') as f:
-            f.write("=== SDN CONTROLLER PERFORMANCE COMPARISON REPORT ===\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            f.write("APPROACHES COMPARED:\n")
-            f.write("1. Rule-based Controller: Enhanced DPI + Port + Statistical Classification\n")
-            f.write("2. ML-based Controller: Machine Learning Traffic Classification\n\n")
-            
-            # Latency Comparison
-            f.write("--- LATENCY PERFORMANCE ---\n")
-            if latency_comp['rule_based'] and latency_comp['ml_based']:
-                f.write(f"Rule-based Average Latency: {latency_comp['rule_based']['avg_latency_ms']:.2f} ms\n")
-                f.write(f"ML-based Average Latency: {latency_comp['ml_based']['avg_latency_ms']:.2f} ms\n")
-                f.write(f"Winner: {latency_comp['winner']}\n")
-                
-                improvement = abs(latency_comp['rule_based']['avg_latency_ms'] - latency_comp['ml_based']['avg_latency_ms'])
-                f.write(f"Performance Difference: {improvement:.2f} ms\n\n")
-            
-            # Throughput Comparison
-            f.write("--- THROUGHPUT PERFORMANCE ---\n")
-            if throughput_comp['rule_based'] and throughput_comp['ml_based']:
-                f.write(f"Rule-based Average Throughput: {throughput_comp['rule_based']['avg_throughput_mbps']:.2f} Mbps\n")
-                f.write(f"ML-based Average Throughput: {throughput_comp['ml_based']['avg_throughput_mbps']:.2f} Mbps\n")
-                f.write(f"Winner: {throughput_comp['winner']}\n\n")
-            
-            # Key Findings
-            f.write("--- KEY RESEARCH FINDINGS ---\n")
-            f.write("Rule-based Approach Limitations:\n")
-            f.write("• DPI fails on encrypted traffic (0-20% success rate)\n")
-            f.write("• Static port-based rules lack adaptability\n")
-            f.write("• Limited context awareness for traffic patterns\n")
-            f.write("• Poor performance on unknown/new protocols\n\n")
-            
-            f.write("ML-based Approach Advantages:\n")
-            f.write("• Works effectively on encrypted traffic using flow features\n")
-            f.write("• Dynamic learning and adaptation capabilities\n")
-            f.write("• Higher classification accuracy and confidence\n")
-            f.write("• Better QoS enforcement based on learned patterns\n")
-            f.write("• Real-time inference with trained XGBoost model\n")
-            f.write("• Scalable to new traffic types without manual rule updates\n\n")
-            
-            # Add ML-specific metrics if available
-            if 'ml_classification' in ml_results:
-                f.write("--- ML CLASSIFICATION PERFORMANCE ---\n")
-                ml_class_data = ml_results['ml_classification']['results']
-                f.write(f"Traffic types successfully classified: {len(ml_class_data)}\n")
-                for result in ml_class_data[:5]:  # Show first 5 examples
-                    f.write(f"• {result['traffic_type']} → {result['expected_class']}\n")
-                f.write("\n")
-            
-            if 'ml_processing' in ml_results:
-                f.write("--- ML PROCESSING EFFICIENCY ---\n")
-                ml_proc_data = ml_results['ml_processing']['results']
-                for result in ml_proc_data:
-                    f.write(f"{result['scenario']}: {result['avg_classification_time_ms']:.2f}ms per classification\n")
-                f.write("\n")
+        buf = []
+        buf.append("=== SDN CONTROLLER PERFORMANCE COMPARISON REPORT ===\n")
+        buf.append(f"Generated: {generated_at}\n\n")
+        
+        buf.append("APPROACHES COMPARED:\n")
+        buf.append("1. Rule-based Controller: Enhanced DPI + Port + Statistical Classification\n")
+        buf.append("2. ML-based Controller: Machine Learning Traffic Classification\n\n")
+        
+        # Latency Comparison
+        buf.append("--- LATENCY PERFORMANCE ---\n")
+        if latency_comp['rule_based'] and latency_comp['ml_based']:
+            buf.append(f"Rule-based Average Latency: {latency_comp['rule_based']['avg_latency_ms']:.2f} ms\n")
+            buf.append(f"ML-based Average Latency: {latency_comp['ml_based']['avg_latency_ms']:.2f} ms\n")
+            buf.append(f"Winner: {latency_comp['winner']}\n")
             
-            f.write("--- RESEARCH CONTRIBUTION SUMMARY ---\n")
-            f.write("This comparison demonstrates the superiority of ML-based traffic\n")
-            f.write("classification over traditional rule-based approaches in modern\n")
-            f.write("encrypted network environments, supporting the research hypothesis\n")
-            f.write("that machine learning is essential for effective SDN traffic management.\n")
+            improvement = abs(latency_comp['rule_based']['avg_latency_ms'] - latency_comp['ml_based']['avg_latency_ms'])
+            buf.append(f"Performance Difference: {improvement:.2f} ms\n\n")
+        
+        # Throughput Comparison
+        buf.append("--- THROUGHPUT PERFORMANCE ---\n")
+        if throughput_comp['rule_based'] and throughput_comp['ml_based']:
+            buf.append(f"Rule-based Average Throughput: {throughput_comp['rule_based']['avg_throughput_mbps']:.2f} Mbps\n")
+            buf.append(f"ML-based Average Throughput: {throughput_comp['ml_based']['avg_throughput_mbps']:.2f} Mbps\n")
+            buf.append(f"Winner: {throughput_comp['winner']}\n\n")
+        
+        # Key Findings
+        buf.append("--- KEY RESEARCH FINDINGS ---\n")
+        buf.append("Rule-based Approach Limitations:\n")
+        buf.append("• DPI fails on encrypted traffic (0-20% success rate)\n")
+        buf.append("• Static port-based rules lack adaptability\n")
+        buf.append("• Limited context awareness for traffic patterns\n")
+        buf.append("• Poor performance on unknown/new protocols\n\n")
+        
+        buf.append("ML-based Approach Advantages:\n")
+        buf.append("• Works effectively on encrypted traffic using flow features\n")
+        buf.append("• Dynamic learning and adaptation capabilities\n")
+        buf.append("• Higher classification accuracy and confidence\n")
+        buf.append("• Better QoS enforcement based on learned patterns\n")
+        buf.append("• Real-time inference with trained XGBoost model\n")
+        buf.append("• Scalable to new traffic types without manual rule updates\n\n")
+        
+        # Add ML-specific metrics if available
+        if 'ml_classification' in ml_results:
+            buf.append("--- ML CLASSIFICATION PERFORMANCE ---\n")
+            ml_class_data = ml_results['ml_classification']['results']
+            buf.append(f"Traffic types successfully classified: {len(ml_class_data)}\n")
+            buf.extend(f"• {r['traffic_type']} → {r['expected_class']}\n"
+                       for r in ml_class_data[:5])  # Show first 5 examples
+            buf.append("\n")
+        
+        if 'ml_processing' in ml_results:
+            buf.append("--- ML PROCESSING EFFICIENCY ---\n")
+            ml_proc_data = ml_results['ml_processing']['results']
+            buf.extend(f"{r['scenario']}: {r['avg_classification_time_ms']:.2f}ms per classification\n"
+                       for r in ml_proc_data)
+            buf.append("\n")
+        
+        buf.append("--- RESEARCH CONTRIBUTION SUMMARY ---\n")
+        buf.append("This comparison demonstrates the superiority of ML-based traffic\n")
+        buf.append("classification over traditional rule-based approaches in modern\n")
+        buf.append("encrypted network environments, supporting the research hypothesis\n")
+        buf.append("that machine learning is essential for effective SDN traffic management.\n")
+        
+        with open(report_file, 'w') as f:
+            f.write(''.join(buf))
+        
+        # Machine-readable side-car so consumers don't have to parse the text report
+        summary_file = f"{self.comparison_dir}/performance_comparison_{timestamp}.json"
+        summary = {
+            'generated_at': generated_at,
+            'latency': latency_comp,
+            'throughput': throughput_comp,
+            'qos': qos_comp
+        }
+        with open(summary_file, 'wb') as f:
+            f.write(_json_dumps(summary))
         
         print(f"✓ Comparison report saved: {report_file}")
+        print(f"✓ Comparison data saved: {summary_file}")
         return report_file
     
-    def create_comparison_visualizations(self, rule_results, ml_results):
+    def create_comparison_visualizations(self, rule_results, ml_results, timestamp):
         """Create comparison charts and graphs"""
         print("Creating comparison visualizations...")
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Imported lazily so report-only runs never load the plotting stack.
+        # Loading it here, before the pool forks, also lets workers inherit it.
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
         
-        # Latency comparison chart
-        plt.figure(figsize=(12, 8))
+        plt.ioff()
+        jobs = []
         
+        # Latency comparison chart
         data_to_plot = []
         labels = []
         
         if 'baseline_latency' in rule_results:
-            rule_latencies = [r['avg_latency_ms'] for r in rule_results['baseline_latency']['results']]
+            rule_latencies = _soa(rule_results['baseline_latency']['results'], ['avg_latency_ms'])['avg_latency_ms']
             data_to_plot.append(rule_latencies)
             labels.append('Rule-based')
         
         if 'ml_latency' in ml_results:
-            ml_latencies = [r['avg_latency_ms'] for r in ml_results['ml_latency']['results']]
+            ml_latencies = _soa(ml_results['ml_latency']['results'], ['avg_latency_ms'])['avg_latency_ms']
             data_to_plot.append(ml_latencies)
             labels.append('ML-enhanced')
         
         if data_to_plot:
-            plt.boxplot(data_to_plot, labels=labels)
-            plt.ylabel('Latency (ms)')
-            plt.title('Latency Performance Comparison: Rule-based vs ML-enhanced')
-            plt.grid(True, alpha=0.3)
-            plt.savefig(f"{self.comparison_dir}/latency_comparison_{timestamp}.png", dpi=300, bbox_inches='tight')
-            plt.close()
-            print("✓ Latency comparison chart created")
+            jobs.append((_plot_latency_chart,
+                         (data_to_plot, labels, f"{self.comparison_dir}/latency_comparison_{timestamp}.png"),
+                         "✓ Latency comparison chart created"))
         
         # Throughput comparison chart
-        plt.figure(figsize=(12, 6))
-        
-        throughput_data = []
-        throughput_labels = []
+        rule_throughputs = np.empty(0)
+        ml_throughputs = np.empty(0)
         
         if 'throughput_performance' in rule_results:
-            rule_throughputs = [r['throughput_mbps'] for r in rule_results['throughput_performance']['results']]
-            throughput_data.extend(rule_throughputs)
-            throughput_labels.extend(['Rule-based'] * len(rule_throughputs))
+            rule_throughputs = _soa(rule_results['throughput_performance']['results'],
+                                    ['throughput_mbps'])['throughput_mbps']
         
         if 'ml_throughput' in ml_results:
-            ml_throughputs = [r['throughput_mbps'] for r in ml_results['ml_throughput']['results']]
-            throughput_data.extend(ml_throughputs)
-            throughput_labels.extend(['ML-enhanced'] * len(ml_throughputs))
-        
-        if throughput_data:
-            # Create bar chart
-            rule_avg = np.mean([t for t, l in zip(throughput_data, throughput_labels) if l == 'Rule-based']) if 'Rule-based' in throughput_labels else 0
-            ml_avg = np.mean([t for t, l in zip(throughput_data, throughput_labels) if l == 'ML-enhanced']) if 'ML-enhanced' in throughput_labels else 0
+            ml_throughputs = _soa(ml_results['ml_throughput']['results'],
+                                  ['throughput_mbps'])['throughput_mbps']
+        
+        if rule_throughputs.size or ml_throughputs.size:
+            rule_avg = rule_throughputs.mean() if rule_throughputs.size else 0
+            ml_avg = ml_throughputs.mean() if ml_throughputs.size else 0
             
             approaches = []
             averages = []
             if rule_avg > 0:
                 approaches.append('Rule-based')
-                averages.append(rule_avg)
+                averages.append(float(rule_avg))
             if ml_avg > 0:
                 approaches.append('ML-enhanced')
-                averages.append(ml_avg)
+                averages.append(float(ml_avg))
             
-            bars = plt.bar(approaches, averages, color=['lightcoral', 'lightblue'])
-            plt.ylabel('Average Throughput (Mbps)')
-            plt.title('Average Throughput Comparison: Rule-based vs ML-enhanced')
-            plt.ylim(0, max(averages) * 1.1 if averages else 100)
-            
-            # Add value labels on bars
-            for bar, avg in zip(bars, averages):
-                plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
-                        f'{avg:.1f} Mbps', ha='center', va='bottom')
-            
-            plt.grid(True, alpha=0.3)
-            plt.savefig(f"{self.comparison_dir}/throughput_comparison_{timestamp}.png", dpi=300, bbox_inches='tight')
-            plt.close()
-            print("✓ Throughput comparison chart created")
+            jobs.append((_plot_throughput_chart,
+                         (approaches, averages, f"{self.comparison_dir}/throughput_comparison_{timestamp}.png"),
+                         "✓ Throughput comparison chart created"))
         
         # QoS effectiveness comparison
-        plt.figure(figsize=(10, 6))
-        
         qos_data = {'Rule-based': [], 'ML-enhanced': []}
         
         # Extract QoS response times
         if 'qos_under' in rule_results:
-            rule_qos_times = [r['avg_response_time_ms'] for r in rule_results['qos_under']['results']]
+            rule_qos_times = list(map(_RESPONSE_TIME, rule_results['qos_under']['results']))
             qos_data['Rule-based'] = rule_qos_times
         
         if 'ml_qos' in ml_results:
-            ml_qos_times = [r['avg_response_time_ms'] for r in ml_results['ml_qos']['results']]
+            ml_qos_times = list(map(_RESPONSE_TIME, ml_results['ml_qos']['results']))
             qos_data['ML-enhanced'] = ml_qos_times
         
         if any(qos_data.values()):
@@ -405,20 +502,60 @@ class PerformanceComparator:
                     pos += 1
             
             if data_to_plot:
-                plt.boxplot(data_to_plot, positions=positions, labels=labels)
-                plt.ylabel('QoS Response Time (ms)')
-                plt.title('QoS Performance Comparison: Rule-based vs ML-enhanced')
-                plt.grid(True, alpha=0.3)
-                plt.savefig(f"{self.comparison_dir}/qos_comparison_{timestamp}.png", dpi=300, bbox_inches='tight')
-                plt.close()
-                print("✓ QoS comparison chart created")
+                jobs.append((_plot_qos_chart,
+                             (data_to_plot, positions, labels, f"{self.comparison_dir}/qos_comparison_{timestamp}.png"),
+                             "✓ QoS comparison chart created"))
+        
+        # The charts are independent, so render and encode them in parallel
+        if jobs:
+            ctx = multiprocessing.get_context('fork')
+            with concurrent.futures.ProcessPoolExecutor(max_workers=len(jobs), mp_context=ctx) as executor:
+                futures = [(executor.submit(func, *args), message) for func, args, message in jobs]
+                for future, message in futures:
+                    future.result()
+                    print(message)
         
         print("✓ All comparison visualizations created")
     
-    def run_comparison(self):
+
+    def input_fingerprint(self):
+        """Hash (name, mtime, size) of every file in the result directories"""
+        entries = []
+        for directory in (self.rule_based_dir, self.ml_based_dir):
+            if not os.path.exists(directory):
+                continue
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file():
+                        st = entry.stat()
+                        entries.append((directory, entry.name, st.st_mtime_ns, st.st_size))
+        
+        return hashlib.blake2b(repr(sorted(entries)).encode(), digest_size=16).hexdigest()
+    
+    def load_cached_report(self, fingerprint):
+        """Return the previous report path if inputs are unchanged and it still exists"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached_fp, report_file = f.read().split('\n', 1)
+        except (OSError, ValueError):
+            return None
+        
+        if cached_fp == fingerprint and os.path.exists(report_file):
+            return report_file
+        return None
+    
+    def run_comparison(self, create_plots=True):
         """Run complete performance comparison"""
         print("=== STARTING PERFORMANCE COMPARISON ANALYSIS ===")
         
+        # Skip the whole run if no result file changed since the last report
+        fingerprint = self.input_fingerprint()
+        cached_report = self.load_cached_report(fingerprint)
+        if cached_report:
+            print("✓ Results unchanged since last comparison, skipping analysis")
+            print(f"📄 Main report: {cached_report}")
+            return True
+        
         # Load results
         print("Loading rule-based results...")
         rule_results = self.load_rule_based_results()
@@ -437,8 +574,17 @@ class PerformanceComparator:
         print(f"Found {len(ml_results)} ML-based result sets")
         
         # Generate comparison
-        report_file = self.generate_comparison_report(rule_results, ml_results)
-        self.create_comparison_visualizations(rule_results, ml_results)
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        generated_at = now.strftime('%Y-%m-%d %H:%M:%S')
+        
+        report_file = self.generate_comparison_report(rule_results, ml_results, timestamp, generated_at)
+        if create_plots:
+            self.create_comparison_visualizations(rule_results, ml_results, timestamp)
+            
+            # Only a full run (report + charts) may satisfy the next cache check
+            with open(self.cache_file, 'w') as f:
+                f.write(f"{fingerprint}\n{report_file}")
         
         print("=== COMPARISON ANALYSIS COMPLETED ===")
         print(f"📊 Results available in: {self.comparison_dir}/")
@@ -448,12 +594,17 @@ class PerformanceComparator:
 
 def main():
     """Main comparison function"""
+    parser = argparse.ArgumentParser(description="Compare Rule-based vs ML-based SDN controller performance")
+    parser.add_argument('--no-plots', action='store_true',
+                        help="only write the text report, skip chart generation")
+    args = parser.parse_args()
+    
     print("=== SDN Controller Performance Comparison Tool ===")
     print("This tool compares Rule-based vs ML-based controller performance")
     print()
     
     comparator = PerformanceComparator()
-    success = comparator.run_comparison()
+    success = comparator.run_comparison(create_plots=not args.no_plots)
     
     if success:
         print("🎉 Performance comparison completed!")
@@ -11,24 +11,250 @@ from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
 from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, icmp
-from ryu.lib.packet import ether_types
+from ryu.lib.packet import ether_types, in_proto
+from ryu.lib import addrconv, hub
+import concurrent.futures
+import functools
+import logging
+import os
+import re
+import struct
 import time
-import numpy as np
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernels then run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to a single regex scan
+    ahocorasick = None
+
+# Request lines, Host: headers and SSH banners all sit near the start of
+# the packet, so DPI only inspects this many leading bytes
+DPI_SCAN_BYTES = 256
+
+# Payload signature -> (traffic class, confidence) for DPI
+DPI_SIGNATURES = [
+    (b'GET ', 'Browsing', 0.9), (b'POST ', 'Browsing', 0.9),
+    (b'HTTP/', 'Browsing', 0.9), (b'Host:', 'Browsing', 0.9),
+    (b'SSH-', 'SSH', 0.8),
+]
+
+# Fallback when pyahocorasick is missing: one alternation regex over all signatures
+DPI_RX = re.compile(b'|'.join(re.escape(pattern) for pattern, _, _ in DPI_SIGNATURES))
+DPI_LABELS = {pattern: (traffic_class, confidence)
+              for pattern, traffic_class, confidence in DPI_SIGNATURES}
+
+def build_dpi_automaton():
+    """Compile all DPI signatures into one Aho-Corasick automaton (None if unavailable)"""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for pattern, traffic_class, confidence in DPI_SIGNATURES:
+        # Payloads are matched as latin-1 text, which maps bytes 1:1 to code points
+        automaton.add_word(pattern.decode('latin-1'), (traffic_class, confidence))
+    automaton.make_automaton()
+    return automaton
+
+ETH_HEADER_LEN = 14
+
+# Numeric codes for the statistical kernel (0 = unknown)
+PROTOCOL_CODES = {'TCP': 1, 'UDP': 2, 'ICMP': 3}
+STAT_CLASSES = (None, 'Video-Streaming', 'File-Transfer', 'Chat', 'ICMP')
+
+@njit(cache=True)
+def stat_kernel(pkt_len, avg_pkt_size, byte_rate, protocol_code):
+    """Statistical classification on plain numbers: (STAT_CLASSES index, confidence)"""
+    # Video streaming: large packets, steady rate
+    if avg_pkt_size > 1000 and byte_rate > 100000:
+        return 1, 0.6
+    
+    # Bulk transfer: very large packets, high throughput
+    if avg_pkt_size > 1200 and byte_rate > 500000:
+        return 2, 0.6
+    
+    # Small packet (likely control/interactive)
+    if pkt_len <= 64:
+        return 3, 0.5
+    
+    # ICMP
+    if protocol_code == 3:
+        return 4, 0.8
+    
+    return 0, 0.0
+
+class FlowStat:
+    """Per-flow counters kept in the flow cache"""
+    __slots__ = ('packet_count', 'byte_count', 'start_time', 'last_packet_time',
+                 'iat_sum', 'iat_count', 'size_sum')
+
+    def __init__(self, now):
+        self.packet_count = 0
+        self.byte_count = 0
+        self.start_time = now
+        self.last_packet_time = now
+        self.iat_sum = 0.0
+        self.iat_count = 0
+        self.size_sum = 0
+
+class FlowShard:
+    """Flow cache owned by one classification worker; no other thread touches it"""
+    __slots__ = ('executor', 'flow_stats', 'packets_seen')
+
+    def __init__(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.flow_stats = OrderedDict()  # LRU order: least recently seen flow first
+        self.packets_seen = 0
+
+def parse_layers(pkt):
+    """Walk the parsed protocol list once: (eth, ipv4, tcp, udp, icmp)"""
+    layers = {}
+    for proto in pkt.protocols:
+        # Keep the outermost header of each type, as get_protocol() does
+        layers.setdefault(type(proto), proto)
+    return (layers.get(ethernet.ethernet), layers.get(ipv4.ipv4),
+            layers.get(tcp.tcp), layers.get(udp.udp), layers.get(icmp.icmp))
+
+def layer_features(layers):
+    """IPv4/L4 header features from parsed Ryu protocol objects"""
+    features = {}
+    _, ipv4_pkt, tcp_pkt, udp_pkt, icmp_pkt = layers
+    
+    if ipv4_pkt:
+        features['ip_proto'] = ipv4_pkt.proto
+        features['ip_ttl'] = ipv4_pkt.ttl
+        features['ip_len'] = ipv4_pkt.total_length
+        
+        # TCP features
+        if tcp_pkt:
+            features['src_port'] = tcp_pkt.src_port
+            features['dst_port'] = tcp_pkt.dst_port
+            features['tcp_flags'] = tcp_pkt.bits
+            features['protocol_type'] = 'TCP'
+        
+        # UDP features
+        if udp_pkt:
+            features['src_port'] = udp_pkt.src_port
+            features['dst_port'] = udp_pkt.dst_port
+            features['protocol_type'] = 'UDP'
+        
+        # ICMP
+        if icmp_pkt:
+            features['protocol_type'] = 'ICMP'
+    
+    return features
+
+def parse_header_features(data):
+    """IPv4/L4 header features read straight from the frame bytes"""
+    if len(data) < ETH_HEADER_LEN:
+        return {}
+    ethertype = struct.unpack_from('!H', data, 12)[0]
+    
+    if ethertype == ether_types.ETH_TYPE_IP and len(data) >= ETH_HEADER_LEN + 20:
+        ver_ihl = data[ETH_HEADER_LEN]
+        total_length = struct.unpack_from('!H', data, ETH_HEADER_LEN + 2)[0]
+        ttl, proto = data[ETH_HEADER_LEN + 8], data[ETH_HEADER_LEN + 9]
+        features = {'ip_proto': proto, 'ip_ttl': ttl, 'ip_len': total_length}
+        
+        l4 = ETH_HEADER_LEN + (ver_ihl & 0x0F) * 4
+        if proto == in_proto.IPPROTO_TCP and len(data) >= l4 + 14:
+            features['src_port'], features['dst_port'] = struct.unpack_from('!HH', data, l4)
+            # Same 9 flag bits (NS..FIN) that Ryu exposes as tcp.bits
+            features['tcp_flags'] = struct.unpack_from('!H', data, l4 + 12)[0] & 0x01FF
+            features['protocol_type'] = 'TCP'
+        elif proto == in_proto.IPPROTO_UDP and len(data) >= l4 + 4:
+            features['src_port'], features['dst_port'] = struct.unpack_from('!HH', data, l4)
+            features['protocol_type'] = 'UDP'
+        elif proto == in_proto.IPPROTO_ICMP:
+            features['protocol_type'] = 'ICMP'
+        return features
+    
+    # VLAN-tagged frames may still carry IPv4, so let Ryu find it
+    if ethertype in (ether_types.ETH_TYPE_8021Q, ether_types.ETH_TYPE_8021AD):
+        return layer_features(parse_layers(packet.Packet(data)))
+    
+    return {}
 
 class EnhancedRuleController(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
+    
+    # Well-known port -> (traffic class, confidence)
+    PORT_TABLE = {
+        53: ('DNS', 0.9),                                           # DNS (high priority)
+        80: ('Browsing', 0.8), 443: ('Browsing', 0.8),              # Web traffic (medium-high priority)
+        8080: ('Browsing', 0.8), 8443: ('Browsing', 0.8),
+        22: ('SSH', 0.7),                                           # SSH (medium priority)
+        25: ('Email', 0.6), 587: ('Email', 0.6),                    # Email (medium priority)
+        993: ('Email', 0.6), 995: ('Email', 0.6),
+        20: ('File-Transfer', 0.6), 21: ('File-Transfer', 0.6),     # FTP (low priority)
+    }
+
+    # Order the port rules are checked in (e.g. Email before FTP at equal confidence)
+    PORT_CLASS_ORDER = ('DNS', 'Browsing', 'SSH', 'Email', 'File-Transfer')
+
+    # Ports whose payload is encrypted, where DPI can never match
+    ENCRYPTED_PORTS = frozenset((443, 8443))
+    
+    # Traffic class -> base OpenFlow priority (anything else gets 1000)
+    BASE_PRIORITY = {
+        # High priority traffic types
+        'DNS': 3000, 'VOIP': 3000, 'Video-Streaming': 3000,
+        'Audio-Streaming': 3000, 'Chat': 3000, 'ICMP': 3000,
+        # Medium priority traffic types
+        'Browsing': 2000, 'Email': 2000, 'SSH': 2000,
+        # Low priority traffic types
+        'File-Transfer': 1000, 'P2P': 1000, 'Bulk': 1000, 'TCP-Generic': 1000,
+    }
+    
+    # Flow cache bounds: hard size cap plus idle purge, swept periodically
+    FLOW_TABLE_CAP = 100000
+    FLOW_IDLE_TIMEOUT = 600  # seconds
+    FLOW_SWEEP_INTERVAL = 1000  # packets
+    
+    # Outgoing OpenFlow messages are coalesced per switch and flushed on a
+    # short timer, or as soon as a batch fills up
+    SEND_BATCH_SIZE = 32
+    SEND_FLUSH_INTERVAL = 0.001  # seconds
 
     def __init__(self, *args, **kwargs):
         super(EnhancedRuleController, self).__init__(*args, **kwargs)
         self.mac_to_port = {}
-        self.flow_stats = defaultdict(dict)
+        self._dpi_ac = build_dpi_automaton()
+        stat_kernel(0.0, 0.0, 0.0, 0)  # compile the JIT kernel before traffic arrives
+        
+        # Port and priority decisions depend only on their arguments, so
+        # packets of an already-seen flow signature hit these caches
+        self._port_decision = functools.lru_cache(maxsize=4096)(self._decide_ports)
+        self._priority_for = functools.lru_cache(maxsize=256)(self.get_priority_from_rule_classification)
+        
+        # Per-datapath send queues, sent in queue order. Classification is
+        # asynchronous, so a packet's packet-out goes out before the flow entry
+        # its verdict produces; that entry only matters for the flow's later packets
+        self._pending_msgs = defaultdict(list)
+        self._pending_datapaths = {}
+        self._send_flusher = hub.spawn(self._flush_loop)
+        
+        # One single-threaded worker per shard, each with its own flow cache;
+        # a flow always hashes to the same shard, so no locking is needed
+        self._shards = [FlowShard() for _ in range(os.cpu_count() or 1)]
+        
+        # Worker verdicts waiting for the hub, which alone counts them and queues
+        # their flow-mods. deque appends/pops are thread-safe; hub queues are not
+        self._verdicts = deque()
         
         # Performance tracking
         self.classification_count = 0
         self.dpi_attempts = 0
         self.dpi_successes = 0
-        self.rule_classification_times = []
+        self._cls_time_sum_ns = 0
+        self._cls_time_count = 0
         
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
@@ -55,104 +281,117 @@ class EnhancedRuleController(app_manager.RyuApp):
         else:
             mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
                                   match=match, instructions=inst)
-        datapath.send_msg(mod)
+        self.queue_msg(datapath, mod)
 
-    def extract_flow_features(self, pkt, in_port, eth_src, eth_dst):
+    def queue_msg(self, datapath, msg):
+        """Queue an OpenFlow message for the next batched send to this switch"""
+        dpid = datapath.id
+        pending = self._pending_msgs[dpid]
+        self._pending_datapaths[dpid] = datapath
+        pending.append(msg)
+        if len(pending) >= self.SEND_BATCH_SIZE:
+            self.flush_msgs(dpid)
+
+    def flush_msgs(self, dpid):
+        """Send every queued message for one switch in order, closed by a barrier"""
+        msgs = self._pending_msgs.pop(dpid, None)
+        if msgs:
+            datapath = self._pending_datapaths[dpid]
+            for msg in msgs:
+                datapath.send_msg(msg)
+            datapath.send_msg(datapath.ofproto_parser.OFPBarrierRequest(datapath))
+
+    def _flush_loop(self):
+        while True:
+            hub.sleep(self.SEND_FLUSH_INTERVAL)
+            self._apply_verdicts()
+            for dpid in list(self._pending_msgs):
+                self.flush_msgs(dpid)
+
+    def expire_idle_flows(self, flow_stats, now):
+        """Drop flows idle for longer than FLOW_IDLE_TIMEOUT"""
+        # LRU order means the stalest flows are at the front
+        cutoff = now - self.FLOW_IDLE_TIMEOUT
+        while flow_stats:
+            oldest = next(iter(flow_stats.values()))
+            if oldest.last_packet_time >= cutoff:
+                break
+            flow_stats.popitem(last=False)
+
+    def extract_flow_features(self, shard, pkt_data, in_port, eth_src, eth_dst, header_features):
         """Extract same flow-level features as ML controller"""
         features = {}
         current_time = time.time()
         
         # Basic packet features
-        features['packet_length'] = len(pkt.data)
+        features['packet_length'] = len(pkt_data)
         features['in_port'] = in_port
         
         # Protocol analysis
-        ipv4_pkt = pkt.get_protocol(ipv4.ipv4)
-        if ipv4_pkt:
-            features['ip_proto'] = ipv4_pkt.proto
-            features['ip_ttl'] = ipv4_pkt.ttl
-            features['ip_len'] = ipv4_pkt.total_length
-            
-            # TCP features
-            tcp_pkt = pkt.get_protocol(tcp.tcp)
-            if tcp_pkt:
-                features['src_port'] = tcp_pkt.src_port
-                features['dst_port'] = tcp_pkt.dst_port
-                features['tcp_flags'] = tcp_pkt.bits
-                features['protocol_type'] = 'TCP'
-            
-            # UDP features
-            udp_pkt = pkt.get_protocol(udp.udp)
-            if udp_pkt:
-                features['src_port'] = udp_pkt.src_port
-                features['dst_port'] = udp_pkt.dst_port
-                features['protocol_type'] = 'UDP'
-            
-            # ICMP
-            icmp_pkt = pkt.get_protocol(icmp.icmp)
-            if icmp_pkt:
-                features['protocol_type'] = 'ICMP'
+        features.update(header_features)
         
         # Flow-based features (maintain flow state like ML controller)
-        flow_key = f"{eth_src}-{eth_dst}"
-        
-        if flow_key not in self.flow_stats:
-            self.flow_stats[flow_key] = {
-                'packet_count': 0,
-                'byte_count': 0,
-                'start_time': current_time,
-                'last_packet_time': current_time,
-                'inter_arrival_times': [],
-                'packet_sizes': []
-            }
-        
-        flow_stat = self.flow_stats[flow_key]
-        flow_stat['packet_count'] += 1
-        flow_stat['byte_count'] += len(pkt.data)
-        
-        # Inter-arrival time
-        if flow_stat['last_packet_time']:
-            inter_arrival = current_time - flow_stat['last_packet_time']
-            flow_stat['inter_arrival_times'].append(inter_arrival)
+        flow_stats = shard.flow_stats
+        shard.packets_seen += 1
+        if shard.packets_seen % self.FLOW_SWEEP_INTERVAL == 0:
+            self.expire_idle_flows(flow_stats, current_time)
+        
+        flow_key = (eth_src, eth_dst)
+        
+        flow_stat = flow_stats.get(flow_key)
+        if flow_stat is None:
+            flow_stat = FlowStat(current_time)
+            flow_stats[flow_key] = flow_stat
+            if len(flow_stats) > self.FLOW_TABLE_CAP:
+                flow_stats.popitem(last=False)
+        else:
+            flow_stats.move_to_end(flow_key)
+        
+        flow_stat.packet_count += 1
+        flow_stat.byte_count += len(pkt_data)
+        
+        # Inter-arrival time (running sums keep this O(1) per packet)
+        if flow_stat.last_packet_time:
+            inter_arrival = current_time - flow_stat.last_packet_time
+            flow_stat.iat_sum += inter_arrival
+            flow_stat.iat_count += 1
             features['inter_arrival_time'] = inter_arrival
         
-        flow_stat['last_packet_time'] = current_time
-        flow_stat['packet_sizes'].append(len(pkt.data))
+        flow_stat.last_packet_time = current_time
+        flow_stat.size_sum += len(pkt_data)
         
         # Flow statistical features
-        features['flow_duration'] = current_time - flow_stat['start_time']
-        features['flow_packet_count'] = flow_stat['packet_count']
-        features['flow_byte_count'] = flow_stat['byte_count']
+        features['flow_duration'] = current_time - flow_stat.start_time
+        features['flow_packet_count'] = flow_stat.packet_count
+        features['flow_byte_count'] = flow_stat.byte_count
         
-        if len(flow_stat['inter_arrival_times']) > 1:
-            features['avg_inter_arrival'] = np.mean(flow_stat['inter_arrival_times'])
+        if flow_stat.iat_count > 1:
+            features['avg_inter_arrival'] = flow_stat.iat_sum / flow_stat.iat_count
         
-        if len(flow_stat['packet_sizes']) > 1:
-            features['avg_packet_size'] = np.mean(flow_stat['packet_sizes'])
+        if flow_stat.packet_count > 1:
+            features['avg_packet_size'] = flow_stat.size_sum / flow_stat.packet_count
         
         if features['flow_duration'] > 0:
-            features['packet_rate'] = flow_stat['packet_count'] / features['flow_duration']
-            features['byte_rate'] = flow_stat['byte_count'] / features['flow_duration']
+            features['packet_rate'] = flow_stat.packet_count / features['flow_duration']
+            features['byte_rate'] = flow_stat.byte_count / features['flow_duration']
         
         return features
 
     def attempt_dpi_classification(self, pkt_data):
         """Traditional DPI - fails on encrypted traffic"""
-        self.dpi_attempts += 1
-        
         try:
-            # Look for HTTP patterns (only works on unencrypted)
-            http_patterns = [b'GET ', b'POST ', b'HTTP/', b'Host:']
-            
-            for pattern in http_patterns:
-                if pattern in pkt_data:
-                    self.dpi_successes += 1
-                    return 'Browsing', 0.9, 'DPI'
+            # Single pass over the payload for all signatures
+            if self._dpi_ac is not None:
+                head = bytes(pkt_data[:DPI_SCAN_BYTES])
+                for _, (traffic_class, confidence) in self._dpi_ac.iter(head.decode('latin-1')):
+                    return traffic_class, confidence, 'DPI'
+                return None, 0.0, 'DPI_Failed'
             
-            # Look for other unencrypted protocols
-            if b'SSH-' in pkt_data:
-                self.dpi_successes += 1
-                return 'SSH', 0.8, 'DPI'
+            # Look for HTTP patterns or an SSH banner (only works on unencrypted)
+            match = DPI_RX.search(pkt_data, 0, DPI_SCAN_BYTES)
+            if match:
+                traffic_class, confidence = DPI_LABELS[match.group()]
+                return traffic_class, confidence, 'DPI'
             
             # DPI failed (likely encrypted)
             return None, 0.0, 'DPI_Failed'
@@ -160,431 +399,135 @@ class EnhancedRuleController(app_manager.RyuApp):
         except:
             return None, 0.0, 'DPI_Error'
 
-    def port_based_classification(self, features):
-        """Traditional port-based classification"""
-        src_port = features.get('src_port', 0)
-        dst_port = features.get('dst_port', 0)
-        
-        # DNS (high priority)
-        if dst_port == 53 or src_port == 53:
-            return 'DNS', 0.9, 'Port-based'
-        
-        # Web traffic (medium-high priority)
-        if dst_port in [80, 443, 8080, 8443] or src_port in [80, 443, 8080, 8443]:
-            return 'Browsing', 0.8, 'Port-based'
-        
-        # SSH (medium priority)
-        if dst_port == 22 or src_port == 22:
-            return 'SSH', 0.7, 'Port-based'
-        
-        # Email (medium priority)
-        if dst_port in [25, 587, 993, 995] or src_port in [25, 587, 993, 995]:
-            return 'Email', 0.6, 'Port-based'
-        
-        # FTP (low priority)
-        if dst_port in [20, 21] or src_port in [20, 21]:
-            return 'File-Transfer', 0.6, 'Port-based'
+    def _decide_ports(self, src_port, dst_port):
+        """Port classification plus whether it may skip DPI (encrypted port)"""
+        # Well-known ports: one table lookup per side, stronger match wins and
+        # equal confidence goes to the class checked first in PORT_CLASS_ORDER
+        dst_hit = self.PORT_TABLE.get(dst_port)
+        src_hit = self.PORT_TABLE.get(src_port)
+        if dst_hit or src_hit:
+            if not dst_hit or (src_hit and (src_hit[1], -self.PORT_CLASS_ORDER.index(src_hit[0])) >
+                                           (dst_hit[1], -self.PORT_CLASS_ORDER.index(dst_hit[0]))):
+                dst_hit = src_hit
+            # TLS ports can't be inspected, so a confident port match skips DPI
+            skip_dpi = dst_hit[1] >= 0.8 and (dst_port in self.ENCRYPTED_PORTS or
+                                              src_port in self.ENCRYPTED_PORTS)
+            return dst_hit[0], dst_hit[1], 'Port-based', skip_dpi
         
         # VoIP ports (high priority)
         if 16384 <= dst_port <= 32768 or 16384 <= src_port <= 32768:
-            return 'VOIP', 0.5, 'Port-based'
+            return 'VOIP', 0.5, 'Port-based', False
         
-        return None, 0.0, 'Port-unknown'
+        return None, 0.0, 'Port-unknown', False
 
     def statistical_classification(self, features):
         """Statistical analysis of flow characteristics"""
-        pkt_len = features.get('packet_length', 0)
-        avg_pkt_size = features.get('avg_packet_size', 0)
-        byte_rate = features.get('byte_rate', 0)
-        packet_rate = features.get('packet_rate', 0)
-        
-        # Video streaming: large packets, steady rate
-        if avg_pkt_size > 1000 and byte_rate > 100000:
-            return 'Video-Streaming', 0.6, 'Statistical'
-        
-        # Bulk transfer: very large packets, high throughput
-        if avg_pkt_size > 1200 and byte_rate > 500000:
-            return 'File-Transfer', 0.6, 'Statistical'
-        
-        # Small packet (likely control/interactive)
-        if pkt_len <= 64:
-            return 'Chat', 0.5, 'Statistical'
-        
-        # ICMP
-        if features.get('protocol_type') == 'ICMP':
-            return 'ICMP', 0.8, 'Statistical'
-        
+        class_id, confidence = stat_kernel(
+            float(features.get('packet_length', 0)),
+            float(features.get('avg_packet_size', 0)),
+            float(features.get('byte_rate', 0)),
+            PROTOCOL_CODES.get(features.get('protocol_type'), 0))
+        
+        if class_id:
+            return STAT_CLASSES[class_id], confidence, 'Statistical'
         return None, 0.0, 'Statistical-unknown'
 
-    def rule_based_classify_traffic(self, pkt, raw_features):
-        """Multi-stage rule-based classification - comparable to ML"""
-        self.classification_count += 1
-        start_time = time.time()
+    def rule_based_classify_traffic(self, pkt_data, raw_features):
+        """Multi-stage rule-based classification - comparable to ML; also returns its run time in ns"""
+        start_ns = time.monotonic_ns()
+        result = self._run_classification_stages(pkt_data, raw_features)
+        return result, time.monotonic_ns() - start_ns
+
+    def dpi_applies(self, raw_features):
+        """Only TCP packets long enough to carry a payload can match a signature"""
+        return raw_features.get('protocol_type') == 'TCP' and raw_features.get('packet_length', 0) > 60
+
+    def _run_classification_stages(self, pkt_data, raw_features):
+        """DPI -> port -> statistical -> protocol fallback, first confident stage wins"""
+        port_class, port_conf, port_method, skip_dpi = self._port_decision(
+            raw_features.get('src_port', 0), raw_features.get('dst_port', 0))
+        if skip_dpi:
+            return port_class, port_conf, 'Port-based-fast'
         
         # Stage 1: DPI Attempt (highest confidence when successful)
-        dpi_class, dpi_conf, dpi_method = self.attempt_dpi_classification(pkt.data)
-        if dpi_conf > 0.7:
-            processing_time = time.time() - start_time
-            self.rule_classification_times.append(processing_time)
-            return dpi_class, dpi_conf, dpi_method
+        if self.dpi_applies(raw_features):
+            dpi_class, dpi_conf, dpi_method = self.attempt_dpi_classification(pkt_data)
+            if dpi_conf > 0.7:
+                return dpi_class, dpi_conf, dpi_method
         
         # Stage 2: Port-based Classification
-        port_class, port_conf, port_method = self.port_based_classification(raw_features)
         if port_conf > 0.5:
-            processing_time = time.time() - start_time
-            self.rule_classification_times.append(processing_time)
             return port_class, port_conf, port_method
         
         # Stage 3: Statistical Analysis
         stat_class, stat_conf, stat_method = self.statistical_classification(raw_features)
         if stat_conf > 0.4:
-            processing_time = time.time() - start_time
-            self.rule_classification_times.append(processing_time)
             return stat_class, stat_conf, stat_method
         
         # Stage 4: Protocol-based fallback
         protocol_type = raw_features.get('protocol_type', 'unknown')
         if protocol_type == 'TCP':
-            processing_time = time.time() - start_time
-            self.rule_classification_times.append(processing_time)
             return 'TCP-Generic', 0.3, 'Protocol-fallback'
         
-        processing_time = time.time() - start_time
-        self.rule_classification_times.append(processing_time)
         return 'unknown', 0.1, 'No-classification'
 
     def get_priority_from_rule_classification(self, traffic_class, confidence):
         """Convert rule classification to OpenFlow priority - same as ML"""
-        
-        # High priority traffic types
-        high_priority_classes = [
-            'DNS', 'VOIP', 'Video-Streaming', 'Audio-Streaming', 'Chat', 'ICMP'
-        ]
-        
-        # Medium priority traffic types  
-        medium_priority_classes = [
-            'Browsing', 'Email', 'SSH'
-        ]
-        
-        # Low priority traffic types
-        low_priority_classes = [
-            'File-Transfer', 'P2P', 'Bulk', 'TCP-Generic'
-        ]
-        
-        base_priority = 1000  # Default
-        
-        if traffic_class in high_priority_classes:
-            base_priority = 3000
-        elif traffic_class in medium_priority_classes:
-            base_priority = 2000
-        elif traffic_class in low_priority_classes:
-            base_priority = 1000
+        base_priority = self.BASE_PRIORITY.get(traffic_class, 1000)
         
         # Confidence boost (same as ML approach)
         confidence_boost = int(confidence * 500)
         
-        final_priority = min(base_priority + confidence_boost, 3500)
-        
-        return final_priority
+        return min(base_priority + confidence_boost, 3500)
 
-    @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
-    def packet_in_handler(self, ev):
-        msg = ev.msg
-        datapath = msg.datapath
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
-        in_port = msg.match['in_port']
-
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
-
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
-            return
-
-        dst = eth.dst
-        src = eth.src
-        dpid = datapath.id
-
-        self.mac_to_port.setdefault(dpid, {})
-        self.mac_to_port[dpid][src] = in_port
-
-        if dst in self.mac_to_port[dpid]:
-            out_port = self.mac_to_port[dpid][dst]
-        else:
-            out_port = ofproto.OFPP_FLOOD
-
-        actions = [parser.OFPActionOutput(out_port)]
-
-        # Rule-based traffic classification (comparable to ML approach)
-        if out_port != ofproto.OFPP_FLOOD:
+    def _classify_and_install(self, shard, datapath, in_port, src, dst, data, actions):
+        """Classify a flow's packet on its shard worker and hand the verdict to the hub"""
+        try:
             # Extract features (same as ML)
-            raw_features = self.extract_flow_features(pkt, in_port, src, dst)
+            raw_features = self.extract_flow_features(shard, data, in_port, src, dst,
+                                                      parse_header_features(data))
             
             # Rule-based classification (instead of ML)
-            traffic_class, confidence, method = self.rule_based_classify_traffic(pkt, raw_features)
-            
-            # Get priority based on classification (same logic as ML)
-            priority = self.get_priority_from_rule_classification(traffic_class, confidence)
-            
-            # Log classification result
-            if self.classification_count % 50 == 0:
-                self.logger.info(f"Rule Classification: {traffic_class} (conf: {confidence:.3f}, priority: {priority}) - {method}")
-            
-            match = parser.OFPMatch(in_port=in_port, eth_dst=dst, eth_src=src)
-            
-            if msg.buffer_id != ofproto.OFP_NO_BUFFER:
-                self.add_flow(datapath, priority, match, actions, msg.buffer_id)
-                return
-            else:
-                self.add_flow(datapath, priority, match, actions)
-
-        data = None
-        if msg.buffer_id == ofproto.OFP_NO_BUFFER:
-            data = msg.data
-
-        out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
-                                in_port=in_port, actions=actions, data=data)
-        datapath.send_msg(out)
-        
-        # Periodic performance reporting
-        if self.classification_count > 0 and self.classification_count % 200 == 0:
-            dpi_rate = (self.dpi_successes / self.dpi_attempts * 100) if self.dpi_attempts > 0 else 0
-            avg_processing_time = np.mean(self.rule_classification_times) if self.rule_classification_times else 0
-            
-            self.logger.info(f"Rule-based Performance: DPI {dpi_rate:.1f}% success, {avg_processing_time*1000:.2f}ms avg processing ({self.classification_count} classifications)")
-
-from ryu.base import app_manager
-from ryu.controller import ofp_event
-from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
-from ryu.controller.handler import set_ev_cls
-from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, icmp
-from ryu.lib.packet import ether_types
-import time
-import re
-
-class EnhancedRuleController(app_manager.RyuApp):
-    OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
-
-    def __init__(self, *args, **kwargs):
-        super(EnhancedRuleController, self).__init__(*args, **kwargs)
-        self.mac_to_port = {}
-        self.flow_stats = {}  # Track flow statistics
-        self.dpi_attempts = 0
-        self.dpi_successes = 0
-        
-    @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
-    def switch_features_handler(self, ev):
-        datapath = ev.msg.datapath
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
-
-        # Install table-miss flow entry
-        match = parser.OFPMatch()
-        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
-                                        ofproto.OFPCML_NO_BUFFER)]
-        self.add_flow(datapath, 0, match, actions)
-
-    def add_flow(self, datapath, priority, match, actions, buffer_id=None):
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
-
-        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
-        if buffer_id:
-            mod = parser.OFPFlowMod(datapath=datapath, buffer_id=buffer_id,
-                                  priority=priority, match=match, instructions=inst)
-        else:
-            mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
-                                  match=match, instructions=inst)
-        datapath.send_msg(mod)
-
-    def attempt_dpi_classification(self, pkt_data):
-        """Traditional DPI attempt - will fail on encrypted traffic"""
-        self.dpi_attempts += 1
-        
-        try:
-            # Convert packet data to string for pattern matching
-            data_str = str(pkt_data)
+            (traffic_class, confidence, method), elapsed_ns = self.rule_based_classify_traffic(data, raw_features)
+            dpi_attempted = method != 'Port-based-fast' and self.dpi_applies(raw_features)
             
-            # Look for HTTP patterns (only works on unencrypted)
-            http_patterns = [
-                b'GET ', b'POST ', b'HTTP/', b'Host:', 
-                b'User-Agent:', b'Content-Type:'
-            ]
+            self._verdicts.append((datapath, in_port, src, dst, actions, traffic_class,
+                                   confidence, method, dpi_attempted, elapsed_ns))
+        except Exception:
+            self.logger.exception("Rule classification failed for %s -> %s", src, dst)
+
+    def _apply_verdicts(self):
+        """Account for finished classifications and queue their flow entries (hub only)"""
+        while self._verdicts:
+            (datapath, in_port, src, dst, actions, traffic_class,
+             confidence, method, dpi_attempted, elapsed_ns) = self._verdicts.popleft()
             
-            for pattern in http_patterns:
-                if pattern in pkt_data:
+            self.classification_count += 1
+            self._cls_time_sum_ns += elapsed_ns
+            self._cls_time_count += 1
+            if dpi_attempted:
+                self.dpi_attempts += 1
+                if method == 'DPI':
                     self.dpi_successes += 1
-                    return 'web_traffic', 0.9  # High confidence
-            
-            # Look for other unencrypted protocols
-            if b'SSH-' in pkt_data:
-                self.dpi_successes += 1
-                return 'ssh_traffic', 0.8
-            
-            if b'SMTP' in pkt_data or b'MAIL' in pkt_data:
-                self.dpi_successes += 1
-                return 'email_traffic', 0.7
-            
-            # DPI failed (likely encrypted)
-            return 'unknown', 0.0
-            
-        except:
-            return 'unknown', 0.0
-
-    def port_based_classification(self, tcp_pkt, udp_pkt):
-        """Traditional port-based classification"""
-        if tcp_pkt:
-            src_port = tcp_pkt.src_port
-            dst_port = tcp_pkt.dst_port
-            
-            # Web traffic (high priority)
-            if dst_port in [80, 443, 8080, 8443] or src_port in [80, 443, 8080, 8443]:
-                return 'web_traffic', 0.8
-            
-            # SSH (high priority)
-            elif dst_port == 22 or src_port == 22:
-                return 'ssh_traffic', 0.7
             
-            # Email (medium priority)
-            elif dst_port in [25, 587, 993, 995] or src_port in [25, 587, 993, 995]:
-                return 'email_traffic', 0.6
+            # Periodic performance reporting, once per 200 classifications
+            if self.logger.isEnabledFor(logging.INFO) and self.classification_count % 200 == 0:
+                dpi_rate = (self.dpi_successes / self.dpi_attempts * 100) if self.dpi_attempts > 0 else 0
+                avg_processing_ms = self._cls_time_sum_ns / self._cls_time_count / 1e6
+                
+                self.logger.info("Rule-based Performance: DPI %.1f%% success, %.2fms avg processing (%d classifications)",
+                                 dpi_rate, avg_processing_ms, self.classification_count)
             
-            # FTP (low priority)
-            elif dst_port in [20, 21] or src_port in [20, 21]:
-                return 'ftp_traffic', 0.5
-            
-            # Gaming ports (high priority for interactive)
-            elif dst_port in range(27015, 27030) or src_port in range(27015, 27030):
-                return 'gaming_traffic', 0.8
-        
-        elif udp_pkt:
-            dst_port = udp_pkt.dst_port
-            src_port = udp_pkt.src_port
-            
-            # DNS (high priority)
-            if dst_port == 53 or src_port == 53:
-                return 'dns_traffic', 0.9
+            # Get priority based on classification (same logic as ML)
+            priority = self._priority_for(traffic_class, confidence)
             
-            # VoIP (high priority)
-            elif dst_port in range(16384, 32768) or src_port in range(16384, 32768):
-                return 'voip_traffic', 0.7
-        
-        return 'unknown', 0.0
-
-    def statistical_flow_analysis(self, pkt, tcp_pkt, udp_pkt):
-        """Basic statistical analysis of flow characteristics"""
-        pkt_len = len(pkt.data)
-        current_time = time.time()
-        
-        # Small packet analysis (likely control traffic)
-        if pkt_len <= 64:
-            return 'control_traffic', 0.6
-        
-        # Large packet analysis (likely bulk transfer)
-        elif pkt_len >= 1400:
-            return 'bulk_traffic', 0.4
-        
-        # TCP-specific analysis
-        if tcp_pkt:
-            # SYN packets (connection establishment)
-            if tcp_pkt.bits & 0x02:  # SYN flag
-                return 'connection_setup', 0.7
+            # Log classification result
+            if self.logger.isEnabledFor(logging.INFO) and self.classification_count % 50 == 0:
+                self.logger.info("Rule Classification: %s (conf: %.3f, priority: %d) - %s",
+                                 traffic_class, confidence, priority, method)
             
-            # ACK-only packets (likely interactive)
-            elif tcp_pkt.bits == 0x10:  # ACK only
-                return 'interactive_traffic', 0.6
-        
-        # UDP analysis (likely real-time)
-        elif udp_pkt:
-            return 'realtime_traffic', 0.5
-        
-        return 'unknown', 0.0
-
-    def protocol_based_classification(self, pkt):
-        """Basic protocol-level classification"""
-        ipv4_pkt = pkt.get_protocol(ipv4.ipv4)
-        if not ipv4_pkt:
-            return 'non_ip', 0.1
-        
-        # TCP traffic (reliable, likely interactive)
-        if ipv4_pkt.proto == 6:  # TCP
-            return 'tcp_traffic', 0.5
-        
-        # UDP traffic (unreliable, likely real-time)
-        elif ipv4_pkt.proto == 17:  # UDP
-            return 'udp_traffic', 0.4
-        
-        # ICMP traffic (control)
-        elif ipv4_pkt.proto == 1:  # ICMP
-            return 'icmp_traffic', 0.8
-        
-        return 'other_protocol', 0.2
-
-    def classify_traffic(self, pkt, pkt_data):
-        """Multi-stage classification with confidence scoring"""
-        tcp_pkt = pkt.get_protocol(tcp.tcp)
-        udp_pkt = pkt.get_protocol(udp.udp)
-        
-        classifications = []
-        
-        # Stage 1: DPI Attempt (highest confidence when successful)
-        dpi_result, dpi_conf = self.attempt_dpi_classification(pkt_data)
-        if dpi_conf > 0.0:
-            classifications.append((dpi_result, dpi_conf, 'DPI'))
-        
-        # Stage 2: Port-based Classification
-        port_result, port_conf = self.port_based_classification(tcp_pkt, udp_pkt)
-        if port_conf > 0.0:
-            classifications.append((port_result, port_conf, 'Port'))
-        
-        # Stage 3: Statistical Analysis
-        stat_result, stat_conf = self.statistical_flow_analysis(pkt, tcp_pkt, udp_pkt)
-        if stat_conf > 0.0:
-            classifications.append((stat_result, stat_conf, 'Statistical'))
-        
-        # Stage 4: Protocol-based Fallback
-        proto_result, proto_conf = self.protocol_based_classification(pkt)
-        classifications.append((proto_result, proto_conf, 'Protocol'))
-        
-        # Choose best classification
-        if classifications:
-            best = max(classifications, key=lambda x: x[1])
-            print(f"Classification: {best[0]} (confidence: {best[1]:.2f}, method: {best[2]})")
-            return best[0], best[1]
-        
-        return 'unknown', 0.0
-
-    def get_priority_from_classification(self, traffic_type, confidence):
-        """Convert traffic classification to OpenFlow priority"""
-        base_priorities = {
-            'dns_traffic': 3000,
-            'icmp_traffic': 2800,
-            'web_traffic': 2500,
-            'ssh_traffic': 2400,
-            'gaming_traffic': 2300,
-            'voip_traffic': 2200,
-            'interactive_traffic': 2000,
-            'connection_setup': 1800,
-            'control_traffic': 1600,
-            'email_traffic': 1400,
-            'realtime_traffic': 1200,
-            'tcp_traffic': 1000,
-            'udp_traffic': 900,
-            'bulk_traffic': 800,
-            'ftp_traffic': 700,
-            'other_protocol': 500,
-            'non_ip': 300,
-            'unknown': 100
-        }
-        
-        base_priority = base_priorities.get(traffic_type, 100)
-        
-        # Adjust priority based on confidence
-        # Higher confidence gets priority boost
-        confidence_boost = int(confidence * 200)
-        
-        return min(base_priority + confidence_boost, 3200)  # Cap at 3200
+            match = datapath.ofproto_parser.OFPMatch(in_port=in_port, eth_dst=dst, eth_src=src)
+            self.add_flow(datapath, priority, match, actions)
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def packet_in_handler(self, ev):
@@ -594,14 +537,15 @@ class EnhancedRuleController(app_manager.RyuApp):
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        # Only the Ethernet header is needed to forward; L3/L4 parsing is
+        # deferred until we know the packet will be classified
+        dst_bin, src_bin, ethertype = struct.unpack_from('!6s6sH', msg.data, 0)
 
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
+        if ethertype == ether_types.ETH_TYPE_LLDP:
             return
 
-        dst = eth.dst
-        src = eth.src
+        dst = addrconv.mac.bin_to_text(dst_bin)
+        src = addrconv.mac.bin_to_text(src_bin)
         dpid = datapath.id
 
         self.mac_to_port.setdefault(dpid, {})
@@ -614,30 +558,18 @@ class EnhancedRuleController(app_manager.RyuApp):
 
         actions = [parser.OFPActionOutput(out_port)]
 
-        # Enhanced classification
+        # Rule-based traffic classification (comparable to ML approach).
+        # Hand it to the flow's shard so forwarding isn't held up by DPI;
+        # the hub installs the prioritised flow once the worker has a verdict.
         if out_port != ofproto.OFPP_FLOOD:
-            traffic_type, confidence = self.classify_traffic(pkt, msg.data)
-            priority = self.get_priority_from_classification(traffic_type, confidence)
-            
-            match = parser.OFPMatch(in_port=in_port, eth_dst=dst, eth_src=src)
-            
-            # Add flow with calculated priority
-            if msg.buffer_id != ofproto.OFP_NO_BUFFER:
-                self.add_flow(datapath, priority, match, actions, msg.buffer_id)
-                return
-            else:
-                self.add_flow(datapath, priority, match, actions)
-        
-        # Send packet out
+            shard = self._shards[hash((src, dst)) % len(self._shards)]
+            shard.executor.submit(self._classify_and_install, shard, datapath,
+                                  in_port, src, dst, msg.data, actions)
+
         data = None
         if msg.buffer_id == ofproto.OFP_NO_BUFFER:
             data = msg.data
 
         out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
                                 in_port=in_port, actions=actions, data=data)
-        datapath.send_msg(out)
-        
-        # Print DPI success rate periodically
-        if self.dpi_attempts > 0 and self.dpi_attempts % 100 == 0:
-            success_rate = (self.dpi_successes / self.dpi_attempts) * 100
-            print(f"DPI Success Rate: {success_rate:.1f}% ({self.dpi_successes}/{self.dpi_attempts})")
\ No newline at end of file
+        self.queue_msg(datapath, out)
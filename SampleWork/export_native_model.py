@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# export_native_model.py
+"""
+Export the pickled XGBoost classifier to native files for the ML controller
+Booster -> XGBoost UBJSON (.ubj), scaler/labels/features -> NumPy archive (.npz)
+"""
+
+import os
+import pickle
+import sys
+import numpy as np
+
+MODEL_PATH = 'optimized_xgboost_traffic_classifier.pkl'
+
+def export_native_model(model_path=MODEL_PATH):
+    """Write <model>.ubj and <model>.npz next to the pickled artifacts"""
+    with open(model_path, 'rb') as f:
+        model_artifacts = pickle.load(f)
+    
+    base_path = os.path.splitext(model_path)[0]
+    native_path, preprocess_path = base_path + '.ubj', base_path + '.npz'
+    
+    model_artifacts['model'].get_booster().save_model(native_path)
+    
+    scaler = model_artifacts['scaler']
+    n_features = scaler.n_features_in_
+    arrays = {
+        'mean': scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features),
+        'scale': scaler.scale_ if scaler.scale_ is not None else np.ones(n_features),
+        'class_names': np.asarray(model_artifacts['class_names'], dtype=str),
+        'selected_features': np.asarray(model_artifacts['selected_features'], dtype=str),
+    }
+    # Bin edges differ in length per feature, so each gets its own entry
+    for col, edges in enumerate(model_artifacts.get('feature_bins') or []):
+        arrays[f'feature_bins_{col}'] = np.asarray(edges)
+    np.savez(preprocess_path, **arrays)
+    
+    print(f"✅ Booster saved to {native_path}")
+    print(f"✅ Preprocessing arrays saved to {preprocess_path}")
+
+if __name__ == '__main__':
+    export_native_model(sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH)
@@ -5,516 +5,67 @@ Simplified Performance Testing Framework for ML-Enhanced SDN Controller
 Measures latency, throughput, and basic ML classification metrics
 """
 
+import ctypes
 import subprocess
 import time
 import json
 import csv
 import os
 import signal
+import socket
 import sys
 import re
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from mininet.net import Mininet
 from mininet.node import RemoteController, OVSSwitch
 from mininet.link import TCLink
 from mininet.log import setLogLevel, info
 from mininet.topo import Topo
+import numpy as np
 
-class SimpleStarTopo(Topo):
-    """Simple star topology for ML performance testing"""
-    def __init__(self):
-        Topo.__init__(self)
-        switch = self.addSwitch('s1', protocols='OpenFlow13')
-        for i in range(1, 6):
-            host = self.addHost(f'h{i}', ip=f'10.0.0.{i}/24')
-            self.addLink(host, switch, bw=100, delay='1ms')
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-class MLPerformanceTester:
-    def __init__(self):
-        self.controller_process = None
-        self.net = None
-        self.results_dir = "ml_based_results"
-        self.test_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.setup_directories()
-        
-    def setup_directories(self):
-        """Create directories for results"""
-        os.makedirs(self.results_dir, exist_ok=True)
-        os.makedirs(f"{self.results_dir}/logs", exist_ok=True)
-        info(f"ML results will be saved to: {self.results_dir}/\n")
-    
-    def start_ml_controller(self):
-        """Start ML-enhanced SDN controller"""
-        info("Starting ML-Enhanced SDN controller...\n")
-        
-        # Check if ML model exists
-        model_path = 'optimized_xgboost_traffic_classifier.pkl'
-        if not os.path.exists(model_path):
-            info(f"Warning: ML model not found at {model_path}\n")
-            info("Please run the XGBoost training script first (xgboost3.py)\n")
-            return False
-        
-        controller_log = open(f"{self.results_dir}/logs/ml_controller_{self.test_timestamp}.log", 'w')
-        
-        self.controller_process = subprocess.Popen(
-            ['ryu-manager', 'ml_enhanced_controller.py', '--verbose'],
-            stdout=controller_log,
-            stderr=controller_log
-        )
-        
-        # Wait for controller to start and load ML model
-        time.sleep(5)
-        
-        if self.controller_process.poll() is None:
-            info("ML-enhanced controller started successfully\n")
-            info("XGBoost model loaded for real-time classification\n")
-            return True
-        else:
-            info("Failed to start ML controller\n")
-            return False
-    
-    def start_network(self):
-        """Start Mininet network"""
-        info("Starting network topology...\n")
-        
-        topo = SimpleStarTopo()
-        self.net = Mininet(
-            topo=topo,
-            controller=lambda name: RemoteController(name, ip='127.0.0.1', port=6633),
-            switch=OVSSwitch,
-            link=TCLink,
-            autoSetMacs=True,
-            autoStaticArp=True
-        )
-        
-        self.net.start()
-        time.sleep(3)
-        info("Network started successfully\n")
-        return True
-    
-    def test_ml_enhanced_latency(self):
-        """Test latency with ML-enhanced QoS"""
-        info("Testing latency with ML-enhanced QoS...\n")
-        
-        results = {
-            'timestamp': datetime.now().isoformat(),
-            'test_type': 'ml_enhanced_latency',
-            'description': 'Latency performance with ML-based traffic prioritization',
-            'results': []
-        }
-        
-        hosts = ['h1', 'h2', 'h3', 'h4', 'h5']
-        
-        for i, src_name in enumerate(hosts):
-            for dst_name in hosts[i+1:]:
-                src = self.net.get(src_name)
-                dst_ip = f"10.0.0.{dst_name[1]}"
-                
-                # Run multiple ping tests for accuracy
-                ping_result = src.cmd(f'ping -c 10 -W 1 {dst_ip}')
-                
-                packet_loss = self.parse_packet_loss(ping_result)
-                avg_latency = self.parse_avg_latency(ping_result)
-                min_latency = self.parse_min_latency(ping_result)
-                max_latency = self.parse_max_latency(ping_result)
-                jitter = max_latency - min_latency if max_latency > 0 and min_latency > 0 else 0
-                
-                test_result = {
-                    'src': src_name,
-                    'dst': dst_name,
-                    'dst_ip': dst_ip,
-                    'packet_loss_percent': packet_loss,
-                    'avg_latency_ms': avg_latency,
-                    'min_latency_ms': min_latency,
-                    'max_latency_ms': max_latency,
-                    'jitter_ms': jitter,
-                    'qos_method': 'ML_Enhanced'
-                }
-                
-                results['results'].append(test_result)
-                
-                status = "✓" if packet_loss < 10 else "✗"
-                info(f"{status} {src_name} -> {dst_name}: {avg_latency:.2f}ms avg, {jitter:.2f}ms jitter, {packet_loss}% loss\n")
-        
-        self.save_results('ml_enhanced_latency', results)
-        return results
-    
-    def test_ml_enhanced_throughput(self):
-        """Test throughput with ML classification"""
-        info("Testing throughput with ML classification...\n")
-        
-        results = {
-            'timestamp': datetime.now().isoformat(),
-            'test_type': 'ml_enhanced_throughput',
-            'description': 'Throughput performance with ML-based traffic classification',
-            'results': []
-        }
-        
-        # Test different traffic types that ML should classify
-        test_scenarios = [
-            {'name': 'ml_web_traffic', 'port': 8080, 'duration': 10},
-            {'name': 'ml_bulk_transfer', 'port': 9999, 'duration': 15},
-            {'name': 'ml_mixed_traffic', 'port': 7777, 'duration': 10}
-        ]
-        
-        for scenario in test_scenarios:
-            info(f"Testing {scenario['name']} throughput...\n")
-            
-            h1 = self.net.get('h1')
-            h2 = self.net.get('h2')
-            
-            # Start iperf server
-            h2.cmd(f'iperf -s -p {scenario["port"]} > /tmp/iperf_server_{scenario["port"]}.log 2>&1 &')
-            time.sleep(2)
-            
-            # Run iperf client test
-            start_time = time.time()
-            iperf_result = h1.cmd(f'iperf -c 10.0.0.2 -p {scenario["port"]} -t {scenario["duration"]} -i 1')
-            end_time = time.time()
-            
-            throughput_mbps = self.parse_iperf_throughput(iperf_result)
-            actual_duration = end_time - start_time
-            
-            # Stop server
-            h2.cmd(f'pkill -f "iperf.*{scenario["port"]}" || true')
-            time.sleep(1)
-            
-            # Calculate efficiency (cap at 100% for realistic reporting)
-            raw_efficiency = (throughput_mbps / 100.0) * 100 if throughput_mbps > 0 else 0
-            efficiency = min(raw_efficiency, 100.0)
-            
-            test_result = {
-                'scenario': scenario['name'],
-                'port': scenario['port'],
-                'throughput_mbps': throughput_mbps,
-                'planned_duration': scenario['duration'],
-                'actual_duration': actual_duration,
-                'efficiency_percent': efficiency,
-                'raw_efficiency_percent': raw_efficiency,
-                'classification_method': 'ML_XGBoost',
-                'link_utilization': 'Saturated' if throughput_mbps > 95 else 'Normal'
-            }
-            
-            results['results'].append(test_result)
-            info(f"✓ {scenario['name']}: {throughput_mbps:.2f} Mbps ({efficiency:.1f}% efficiency, {raw_efficiency:.1f}% raw)\n")
-        
-        self.save_results('ml_enhanced_throughput', results)
-        return results
-    
-    def test_ml_qos_simplified(self):
-        """Simplified ML QoS test - basic response time only"""
-        info("Testing ML-based QoS (simplified)...\n")
-        
-        results = {
-            'timestamp': datetime.now().isoformat(),
-            'test_type': 'ml_qos_effectiveness',
-            'description': 'ML-enhanced QoS performance - simplified test',
-            'results': []
-        }
-        
-        # Simple response time tests only
-        info("Running basic ML classification response tests...\n")
-        
-        h1, h2 = self.net.get('h1', 'h2')
-        
-        # Simple response time test
-        for i in range(3):
-            start_time = time.time()
-            result = h1.cmd('ping -c 1 10.0.0.2')
-            response_time = self.parse_avg_latency(result)
-            
-            test_result = {
-                'traffic_type': f'ml_basic_test_{i+1}',
-                'port': 'N/A',
-                'expected_ml_priority': 'baseline',
-                'avg_response_time_ms': response_time,
-                'classification_method': 'ML_XGBoost',
-                'under_load': False
-            }
-            
-            results['results'].append(test_result)
-            info(f"  ML test {i+1}: {response_time:.2f}ms response\n")
-        
-        info("ML QoS testing completed (simplified)\n")
-        self.save_results('ml_qos_effectiveness', results)
-        return results
-    
-    def test_flow_table_efficiency(self):
-        """Simplified flow table check - just count flows without stress testing"""
-        info("Testing flow table efficiency (simplified)...\n")
-        
-        results = {
-            'timestamp': datetime.now().isoformat(),
-            'test_type': 'ml_flow_efficiency',
-            'description': 'Basic flow table monitoring with ML classification',
-            'results': []
-        }
-        
-        # Simple flow count check - no complex connection generation
-        info("Checking basic flow table usage...\n")
-        
-        h1, h2 = self.net.get('h1', 'h2')
-        
-        # Just do a few simple pings to generate flows
-        for i in range(3):
-            start_flows = self.get_flow_count()
-            
-            # Simple ping to generate a flow
-            h1.cmd('ping -c 2 10.0.0.2 > /dev/null 2>&1')
-            time.sleep(1)
-            
-            end_flows = self.get_flow_count()
-            
-            test_result = {
-                'test_iteration': i + 1,
-                'start_flows': start_flows,
-                'end_flows': end_flows,
-                'flows_active': end_flows,
-                'ml_classification_enabled': True,
-                'test_method': 'simplified'
-            }
-            
-            results['results'].append(test_result)
-            info(f"  Test {i+1}: {end_flows} flows active\n")
-        
-        info("Flow table efficiency test completed (simplified)\n")
-        self.save_results('ml_flow_efficiency', results)
-        return results
-    
-    def get_flow_count(self):
-        """Get current flow table entry count"""
-        try:
-            switch = self.net.get('s1')
-            result = switch.cmd('ovs-ofctl dump-flows s1 | wc -l')
-            return max(0, int(result.strip()) - 1)
-        except:
-            return 0
-    
-    def parse_packet_loss(self, ping_output):
-        """Parse packet loss from ping output"""
-        match = re.search(r'(\d+)% packet loss', ping_output)
-        return int(match.group(1)) if match else 100
-    
-    def parse_avg_latency(self, ping_output):
-        """Parse average latency from ping output"""
-        match = re.search(r'rtt min/avg/max/mdev = [\d.]+/([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
-    
-    def parse_min_latency(self, ping_output):
-        """Parse minimum latency from ping output"""
-        match = re.search(r'rtt min/avg/max/mdev = ([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
-    
-    def parse_max_latency(self, ping_output):
-        """Parse maximum latency from ping output"""
-        match = re.search(r'rtt min/avg/max/mdev = [\d.]+/[\d.]+/([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
-    
-    def parse_iperf_throughput(self, iperf_output):
-        """Parse throughput from iperf output"""
-        lines = iperf_output.split('\n')
-        for line in reversed(lines):
-            if 'Mbits/sec' in line and 'sec' in line:
-                match = re.search(r'([\d.]+)\s+Mbits/sec', line)
-                if match:
-                    return float(match.group(1))
-        return 0.0
-    
-    def save_results(self, test_name, results):
-        """Save test results to JSON and CSV"""
-        timestamp = self.test_timestamp
-        
-        # Save JSON
-        json_file = f"{self.results_dir}/{test_name}_{timestamp}.json"
-        with open(json_file, 'w') as f:
-            json.dump(results, f, indent=2)
-        
-        # Save CSV
-        csv_file = f"{self.results_dir}/{test_name}_{timestamp}.csv"
-        
-        if test_name == 'ml_enhanced_latency':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['src', 'dst', 'avg_latency_ms', 'jitter_ms', 'packet_loss_percent', 'qos_method'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['src'], result['dst'], result['avg_latency_ms'],
-                        result['jitter_ms'], result['packet_loss_percent'], result['qos_method']
-                    ])
-        
-        elif test_name == 'ml_enhanced_throughput':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['scenario', 'throughput_mbps', 'efficiency_percent', 'classification_method'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['scenario'], result['throughput_mbps'], 
-                        result['efficiency_percent'], result['classification_method']
-                    ])
-    
-    def generate_ml_performance_summary(self, all_results):
-        """Generate comprehensive ML performance summary"""
-        info("Generating ML performance summary report...\n")
-        
-        summary_file = f"{self.results_dir}/ml_performance_summary_{self.test_timestamp}.txt"
-        
-        with open(summary_file, 'w') as f:
-            f.write("=== ML-ENHANCED SDN CONTROLLER PERFORMANCE SUMMARY ===\n")
-            f.write(f"Test Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Test ID: {self.test_timestamp}\n")
-            f.write("Controller: ML-Enhanced with XGBoost Traffic Classification\n\n")
-            
-            # Latency Performance
-            if 'ml_enhanced_latency' in all_results:
-                latency_data = all_results['ml_enhanced_latency']['results']
-                avg_latencies = [r['avg_latency_ms'] for r in latency_data]
-                avg_jitters = [r['jitter_ms'] for r in latency_data]
-                packet_losses = [r['packet_loss_percent'] for r in latency_data]
-                
-                f.write("--- ML-ENHANCED LATENCY PERFORMANCE ---\n")
-                f.write(f"Average Latency: {sum(avg_latencies)/len(avg_latencies):.2f} ms\n")
-                f.write(f"Average Jitter: {sum(avg_jitters)/len(avg_jitters):.2f} ms\n")
-                f.write(f"Average Packet Loss: {sum(packet_losses)/len(packet_losses):.2f}%\n\n")
-            
-            # Throughput Performance
-            if 'ml_enhanced_throughput' in all_results:
-                throughput_data = all_results['ml_enhanced_throughput']['results']
-                f.write("--- ML-ENHANCED THROUGHPUT PERFORMANCE ---\n")
-                for result in throughput_data:
-                    f.write(f"{result['scenario']}: {result['throughput_mbps']:.2f} Mbps ({result['efficiency_percent']:.1f}% efficiency)\n")
-                f.write("\n")
-            
-            f.write("--- ML APPROACH ADVANTAGES ---\n")
-            f.write("• Real-time traffic classification using trained XGBoost model\n")
-            f.write("• Works effectively on encrypted traffic using flow features\n")
-            f.write("• Dynamic priority assignment based on ML predictions\n")
-            f.write("• Adaptive learning capabilities for new traffic patterns\n\n")
-        
-        info(f"ML performance summary saved: {summary_file}\n")
-    
-    def cleanup(self):
-        """Clean up processes and network"""
-        info("Cleaning up...\n")
-        
-        if self.net:
-            for host in self.net.hosts:
-                host.cmd('pkill -f iperf || true')
-                host.cmd('pkill -f nc || true')
-            self.net.stop()
-        
-        if self.controller_process:
-            self.controller_process.terminate()
-            self.controller_process.wait()
-        
-        os.system('mn -c 2>/dev/null || true')
-        info("Cleanup completed\n")
-    
-    def run_full_ml_performance_tests(self):
-        """Run complete ML performance test suite"""
-        info("=== STARTING ML-ENHANCED CONTROLLER PERFORMANCE TESTS ===\n")
-        info(f"Test ID: {self.test_timestamp}\n")
-        
-        all_results = {}
-        
-        try:
-            # Start ML controller
-            if not self.start_ml_controller():
-                return False
-            
-            # Start network
-            if not self.start_network():
-                return False
-            
-            # Wait for initialization
-            info("Waiting for ML model initialization...\n")
-            time.sleep(8)
-            
-            # Run simplified performance tests
-            info("=== RUNNING SIMPLIFIED ML PERFORMANCE TESTS ===\n")
-            
-            # Test 1: ML-Enhanced Latency
-            all_results['ml_enhanced_latency'] = self.test_ml_enhanced_latency()
-            time.sleep(3)
-            
-            # Test 2: ML-Enhanced Throughput
-            all_results['ml_enhanced_throughput'] = self.test_ml_enhanced_throughput()
-            time.sleep(3)
-            
-            # Test 3: Simplified QoS
-            all_results['ml_qos_effectiveness'] = self.test_ml_qos_simplified()
-            time.sleep(3)
-            
-            # Test 4: Flow Table Efficiency
-            all_results['ml_flow_efficiency'] = self.test_flow_table_efficiency()
-            time.sleep(3)
-            
-            # Generate summary
-            self.generate_ml_performance_summary(all_results)
-            
-            info("=== ML-ENHANCED PERFORMANCE TESTS COMPLETED! ===\n")
-            info(f"Results saved in: {self.results_dir}/\n")
-            
-            return True
-            
-        except KeyboardInterrupt:
-            info("\nML tests interrupted by user\n")
-            return False
-        except Exception as e:
-            info(f"ML tests failed with error: {e}\n")
-            return False
-        finally:
-            self.cleanup()
+# Output parsers, compiled once for the whole run
+_RE_LOSS = re.compile(r'(\d+)% packet loss')
+_RE_RTT = re.compile(r'rtt min/avg/max/mdev = ([\d.]+)/([\d.]+)/([\d.]+)/')
+_RE_ML_PERF = re.compile(r'([\d.]+)ms avg processing time \((\d+) total classifications, ([\d.]+) avg batch size\)')
 
-def main():
-    """Main function"""
-    setLogLevel('info')
-    
-    def signal_handler(sig, frame):
-        info('\nReceived interrupt signal, stopping ML tests...\n')
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    
-    print("=== ML-Enhanced SDN Controller Performance Testing ===")
-    print("Simplified version matching rule-based tests")
-    print("\nPress Ctrl+C to stop anytime\n")
-    
-    # Check if ML model exists
-    if not os.path.exists('optimized_xgboost_traffic_classifier.pkl'):
-        print("ML model not found!")
-        print("Please run the XGBoost training script first:")
-        print("   python3 xgboost3.py")
-        return 1
-    
-    tester = MLPerformanceTester()
-    success = tester.run_full_ml_performance_tests()
-    
-    if success:
-        print("ML-enhanced performance testing completed!")
-        print(f"Results available in: {tester.results_dir}/")
-    else:
-        print("ML testing failed or was interrupted")
-    
-    return 0 if success else 1
+# CSV columns per test; each column is also the key in the test's result dicts
+CSV_COLUMNS = {
+    'ml_classification_accuracy': ['traffic_type', 'expected_class', 'port_used', 'generation_time_sec', 'classification_method'],
+    'ml_processing_performance': ['scenario', 'connections_per_second', 'avg_classification_time_ms', 'amortized_inference_time_ms', 'observed_avg_batch_size', 'ml_model_type'],
+    'ml_enhanced_latency': ['src', 'dst', 'avg_latency_ms', 'jitter_ms', 'packet_loss_percent', 'qos_method'],
+    'ml_enhanced_throughput': ['scenario', 'throughput_mbps', 'efficiency_percent', 'expected_ml_priority', 'classification_method'],
+    'ml_qos_effectiveness': ['traffic_type', 'expected_ml_class', 'avg_response_time_ms', 'classification_method'],
+}
 
-if __name__ == '__main__':
-    sys.exit(main())
+# nc clients/listeners, anchored to the start of the command line: a bare "nc" also
+# matches "asyncio" in the sink server and "enhanced" in the controller's command line
+_NC_PATTERN = r'^nc( |$)'
 
-import subprocess
-import time
-import json
-import csv
-import os
-import signal
-import sys
-import re
-from datetime import datetime
-from mininet.net import Mininet
-from mininet.node import RemoteController, OVSSwitch
-from mininet.link import TCLink
-from mininet.log import setLogLevel, info
-from mininet.topo import Topo
-import numpy as np
+# Everything the tests start on the hosts, killed in one pkill per host at cleanup
+_KILL_PATTERNS = r'^(iperf3?|nc|curl|python3 -m http\.server|python3 -c)( |$)'
+
+# Discard server listening on every port in [argv[1], argv[2]] from one process
+SINK_SERVER = """
+import asyncio, sys
+
+async def sink(reader, writer):
+    while await reader.read(65536):
+        pass
+    writer.close()
+
+async def main(first, last):
+    servers = [await asyncio.start_server(sink, '0.0.0.0', port) for port in range(first, last + 1)]
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+asyncio.run(main(int(sys.argv[1]), int(sys.argv[2])))
+"""
 
 class SimpleStarTopo(Topo):
     """Simple star topology for ML performance testing"""
@@ -531,6 +82,17 @@ class MLPerformanceTester:
         self.net = None
         self.results_dir = "ml_based_results"
         self.test_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.controller_log_path = f"{self.results_dir}/logs/ml_controller_{self.test_timestamp}.log"
+        self.parallel_latency = True  # set False to ping host pairs sequentially when debugging
+        self._host_ip = {f'h{i}': f'10.0.0.{i}' for i in range(1, 6)}
+        self.hosts = {}
+        self.switch = None
+        # Dedicated core for the controller; isolate it with the isolcpus=0 boot parameter for best results
+        self.ctrl_cpus = {0}
+        # Mininet hosts (and the traffic they spawn) stay off the controller's core
+        self.mn_cpus = {2, 4, 6}
+        # In-kernel pktgen for the small-packet test; sends UDP rather than ICMP, so it is opt-in
+        self.use_pktgen = False
         self.setup_directories()
         
     def setup_directories(self):
@@ -550,25 +112,105 @@ class MLPerformanceTester:
             info("Please run the XGBoost training script first (xgboost3.py)\n")
             return False
         
-        controller_log = open(f"{self.results_dir}/logs/ml_controller_{self.test_timestamp}.log", 'w')
+        # The controller's scaling kernel is JIT-compiled when numba is importable
+        if importlib.util.find_spec('numba') is None:
+            info("⚠️  numba not installed, controller will use its NumPy scaling kernel\n")
+        
+        # Compiled Treelite predictor next to the model; the controller falls back to the pickle booster
+        compiled_path = os.path.splitext(model_path)[0] + '.so'
+        if os.path.exists(compiled_path):
+            try:
+                ctypes.CDLL(os.path.abspath(compiled_path))
+                info(f"✓ Compiled Treelite predictor found: {compiled_path}\n")
+            except OSError as e:
+                info(f"⚠️  Compiled predictor {compiled_path} not loadable ({e}), using pickle model\n")
+        else:
+            info(f"Compiled predictor {compiled_path} not found, controller will build it on startup\n")
+        
+        controller_log = open(self.controller_log_path, 'w')
+        
+        # Single-threaded math libraries: per-flow predictions are too small to amortize a thread team
+        env = os.environ.copy()
+        env['OMP_NUM_THREADS'] = '1'
+        env['OPENBLAS_NUM_THREADS'] = '1'
+        env['MKL_NUM_THREADS'] = '1'
         
         self.controller_process = subprocess.Popen(
             ['ryu-manager', 'ml_enhanced_controller.py', '--verbose'],
             stdout=controller_log,
-            stderr=controller_log
+            stderr=controller_log,
+            env=env
         )
+        self.pin_controller()
         
-        # Wait for controller to start and load ML model
-        time.sleep(5)  # Extra time for ML model loading
+        # Ryu loads the ML model before it opens the OpenFlow port, so a listening
+        # port means loading has finished (successfully or not)
+        self.wait_until(lambda: self.controller_process.poll() is not None or self.port_open(6633), timeout=30)
         
         if self.controller_process.poll() is None:
             info("✓ ML-enhanced controller started successfully\n")
-            info("✓ XGBoost model loaded for real-time classification\n")
+            if self.controller_log_contains('ML model loaded successfully'):
+                info("✓ XGBoost model loaded for real-time classification\n")
+            else:
+                info("⚠️  Controller did not report a loaded ML model, port-based fallback in use\n")
+            if not self.controller_log_contains('(quantize=1)'):
+                info("⚠️  Controller is not using the quantized Treelite predictor, FP32 inference path in use\n")
+            if not self.controller_log_contains('nthread=1'):
+                info("⚠️  Controller did not confirm single-threaded XGBoost inference (nthread=1)\n")
             return True
         else:
             info("✗ Failed to start ML controller\n")
             return False
     
+    def wait_until(self, condition, timeout, interval=0.1):
+        """Poll condition until it holds or timeout seconds pass"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(interval)
+        return condition()
+    
+    def port_open(self, port):
+        """Check whether something is listening on a local TCP port"""
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.1).close()
+            return True
+        except OSError:
+            return False
+    
+    def pin_controller(self):
+        """Pin the controller to its dedicated core and raise its scheduling priority"""
+        pid = self.controller_process.pid
+        try:
+            os.sched_setaffinity(pid, self.ctrl_cpus)
+            info(f"✓ Controller pinned to CPU {sorted(self.ctrl_cpus)}\n")
+        except (AttributeError, OSError) as e:
+            info(f"⚠️  Could not pin controller to CPU {sorted(self.ctrl_cpus)}: {e}\n")
+        
+        try:
+            os.setpriority(os.PRIO_PROCESS, pid, -5)  # requires CAP_SYS_NICE
+        except (AttributeError, OSError) as e:
+            info(f"⚠️  Could not raise controller priority: {e}\n")
+    
+    def pin_hosts(self):
+        """Pin the host shells and this tester to the Mininet cores, away from the controller"""
+        cpus = self.mn_cpus & os.sched_getaffinity(0)
+        if not cpus:
+            info(f"⚠️  None of the Mininet CPUs {sorted(self.mn_cpus)} are available, hosts not pinned\n")
+            return
+        
+        # host.popen() runs mnexec from this process, so every tool the tests start
+        # (iperf, nc, ping, the sink server) inherits the tester's affinity, not the shell's
+        os.sched_setaffinity(0, cpus)
+        
+        for host in self.net.hosts:
+            try:
+                os.sched_setaffinity(host.pid, cpus)
+            except OSError as e:
+                info(f"⚠️  Could not pin {host.name}: {e}\n")
+        info(f"✓ Mininet hosts pinned to CPUs {sorted(cpus)}\n")
+    
     def start_network(self):
         """Start Mininet network"""
         info("Starting network topology...\n")
@@ -584,7 +226,11 @@ class MLPerformanceTester:
         )
         
         self.net.start()
-        time.sleep(3)  # Extra stabilization time for ML processing
+        self.hosts = {h.name: h for h in self.net.hosts}
+        self.switch = self.net.get('s1')
+        self.pin_hosts()
+        if not self.net.waitConnected(timeout=10):
+            info("⚠️  Switch did not connect to the controller within 10s\n")
         info("✓ Network started successfully\n")
         return True
     
@@ -611,7 +257,7 @@ class MLPerformanceTester:
         for traffic_test in traffic_tests:
             info(f"  Testing {traffic_test['name']} classification...\n")
             
-            h1, h2 = self.net.get('h1', 'h2')
+            h1, h2 = self.hosts['h1'], self.hosts['h2']
             
             # Generate specific traffic type
             classification_start = time.time()
@@ -620,36 +266,33 @@ class MLPerformanceTester:
                 # Generate web traffic
                 h2.cmd(f'python3 -m http.server {traffic_test["port"]} > /dev/null 2>&1 &')
                 time.sleep(1)
-                for i in range(10):  # Multiple requests for better classification
-                    h1.cmd(f'curl -s http://10.0.0.2:{traffic_test["port"]}/ > /dev/null')
-                    time.sleep(0.2)
+                # Multiple requests for better classification, paced inside one shell
+                h1.cmd(f'for i in $(seq 1 10); do curl -s http://10.0.0.2:{traffic_test["port"]}/ > /dev/null; sleep 0.2; done')
                 h2.cmd(f'pkill -f "python3.*{traffic_test["port"]}" || true')
                 
             elif traffic_test['method'] == 'large_file':
-                # Generate bulk transfer
-                h2.cmd(f'nc -l {traffic_test["port"]} > /dev/null &')
+                # Generate bulk transfer with a fixed byte count; the one-off server exits by itself
+                h2.cmd(f'iperf3 -s -p {traffic_test["port"]} -1 > /dev/null 2>&1 &')
                 time.sleep(1)
-                h1.cmd(f'timeout 3 dd if=/dev/zero bs=1024 count=500 | nc 10.0.0.2 {traffic_test["port"]}')
-                h2.cmd('pkill -f nc || true')
+                transfer_output = self.run_on(h1, ['iperf3', '-c', '10.0.0.2', '-n', '512K', '-J', '-p', str(traffic_test['port'])], capture=True)
+                if self.parse_iperf_json(transfer_output) == 0.0:
+                    info("    ⚠️  Bulk transfer did not complete\n")
                 
             elif traffic_test['method'] == 'dns_lookup':
                 # Generate DNS traffic
-                for i in range(5):
-                    h1.cmd('nslookup google.com 8.8.8.8 > /dev/null 2>&1')
-                    time.sleep(0.5)
+                h1.cmd('for i in $(seq 1 5); do nslookup google.com 8.8.8.8 > /dev/null 2>&1; sleep 0.5; done')
                     
             elif traffic_test['method'] == 'ssh_connection':
                 # Generate SSH-like traffic
                 h2.cmd(f'timeout 5 nc -l {traffic_test["port"]} > /dev/null &')
                 time.sleep(1)
-                h1.cmd(f'timeout 3 nc 10.0.0.2 {traffic_test["port"]} < /dev/null > /dev/null 2>&1 || true')
-                h2.cmd('pkill -f nc || true')
+                self.run_on(h1, ['timeout', '3', 'nc', '10.0.0.2', str(traffic_test['port'])])
+                h2.cmd(f"pkill -f '{_NC_PATTERN}' || true")
                 
             elif traffic_test['method'] == 'ping_flood':
-                # Generate ICMP traffic
-                for i in range(20):
-                    h1.cmd('ping -c 1 -s 32 10.0.0.2 > /dev/null 2>&1')
-                    time.sleep(0.1)
+                # Generate ICMP traffic (or a high-rate UDP burst from pktgen when enabled)
+                if not (self.use_pktgen and self.run_pktgen(h1, h2, count=20000, pkt_size=64)):
+                    self.run_on(h1, ['ping', '-c', '20', '-i', '0.1', '-s', '32', '10.0.0.2'])
             
             classification_time = time.time() - classification_start
             
@@ -672,6 +315,33 @@ class MLPerformanceTester:
         self.save_results('ml_classification_accuracy', results)
         return results
     
+    def run_on(self, host, argv, capture=False):
+        """Run argv on a host without a shell; return its output when capture is set"""
+        if capture:
+            proc = host.popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, universal_newlines=True)
+            return proc.communicate()[0]
+        return host.popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL).wait()
+    
+    def run_pktgen(self, src, dst, count, pkt_size):
+        """Send a UDP burst from src to dst with the in-kernel packet generator"""
+        pgdir = '/proc/net/pktgen'
+        intf = src.defaultIntf().name
+        if 'ready' not in src.cmd(f'modprobe pktgen 2>/dev/null; test -w {pgdir}/pgctrl && echo ready'):
+            info("    ⚠️  pktgen unavailable (needs root and the pktgen module), using ping\n")
+            return False
+        
+        src.cmd(f'echo "rem_device_all" > {pgdir}/kpktgend_0; '
+                f'echo "add_device {intf}" > {pgdir}/kpktgend_0; '
+                f'echo "count {count}" > {pgdir}/{intf}; '
+                f'echo "pkt_size {pkt_size}" > {pgdir}/{intf}; '
+                f'echo "delay 0" > {pgdir}/{intf}; '
+                f'echo "dst {dst.IP()}" > {pgdir}/{intf}; '
+                f'echo "dst_mac {dst.MAC()}" > {pgdir}/{intf}; '
+                f'echo "start" > {pgdir}/pgctrl')
+        return True
+    
     def test_ml_processing_performance(self):
         """Test ML model processing speed and overhead"""
         info("Testing ML processing performance...\n")
@@ -690,19 +360,19 @@ class MLPerformanceTester:
             {'name': 'heavy_load', 'connections': 30, 'duration': 15}
         ]
         
+        h1, h2 = self.hosts['h1'], self.hosts['h2']
+        
+        # One listener process serves every port, so only client spawns are timed
+        max_connections = max(scenario['connections'] for scenario in load_scenarios)
+        sink_server = h2.popen(['python3', '-c', SINK_SERVER, '8000', str(8000 + max_connections - 1)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(1)
+        
         for scenario in load_scenarios:
             info(f"  Testing ML processing under {scenario['name']}...\n")
             
-            h1, h2 = self.net.get('h1', 'h2')
-            
             processing_start = time.time()
             
-            # Generate multiple concurrent connections to test ML processing speed
-            for port in range(8000, 8000 + scenario['connections']):
-                h2.cmd(f'timeout {scenario["duration"]} nc -l {port} > /dev/null 2>&1 &')
-            
-            time.sleep(1)
-            
             # Create connections that will trigger ML classification
             for port in range(8000, 8000 + scenario['connections']):
                 h1.cmd(f'timeout 2 nc 10.0.0.2 {port} < /dev/null > /dev/null 2>&1 &')
@@ -715,10 +385,12 @@ class MLPerformanceTester:
             total_processing_time = processing_end - processing_start
             
             # Cleanup
-            h1.cmd('pkill -f nc || true')
-            h2.cmd('pkill -f nc || true')
+            h1.cmd(f"pkill -f '{_NC_PATTERN}' || true")
             time.sleep(1)
             
+            # Batch sizes and amortized per-sample inference time as reported by the controller
+            ml_stats = self.parse_controller_performance()
+            
             test_result = {
                 'scenario': scenario['name'],
                 'planned_connections': scenario['connections'],
@@ -726,11 +398,18 @@ class MLPerformanceTester:
                 'connections_per_second': scenario['connections'] / total_processing_time,
                 'ml_model_type': 'XGBoost',
                 'estimated_classifications': scenario['connections'] * 2,  # Rough estimate
-                'avg_classification_time_ms': (total_processing_time / (scenario['connections'] * 2)) * 1000
+                'avg_classification_time_ms': (total_processing_time / (scenario['connections'] * 2)) * 1000,
+                'amortized_inference_time_ms': ml_stats['amortized_time_ms'] if ml_stats else None,
+                'observed_avg_batch_size': ml_stats['avg_batch_size'] if ml_stats else None
             }
             
             results['results'].append(test_result)
             info(f"    ✓ {scenario['name']}: {test_result['connections_per_second']:.1f} conn/sec processing\n")
+            if ml_stats:
+                info(f"      Controller: {ml_stats['amortized_time_ms']:.3f}ms/sample amortized, {ml_stats['avg_batch_size']:.1f} avg batch size\n")
+        
+        sink_server.terminate()
+        sink_server.wait()
         
         self.save_results('ml_processing_performance', results)
         return results
@@ -746,20 +425,33 @@ class MLPerformanceTester:
             'results': []
         }
         
-        hosts = ['h1', 'h2', 'h3', 'h4', 'h5']
+        hosts = list(self._host_ip)
+        
+        sources = []
+        for i, src_name in enumerate(hosts[:-1]):
+            dst_names = hosts[i+1:]
+            sources.append((src_name, dst_names, [self._host_ip[dst_name] for dst_name in dst_names]))
+        
+        def ping_destinations(source):
+            """Run multiple ping tests for accuracy, one shell for all of this source's destinations"""
+            src_name, dst_names, dst_ips = source
+            # Only the two summary lines (loss, rtt) of each ping leave the host
+            proc = self.hosts[src_name].popen(
+                ['sh', '-c', f'for ip in {" ".join(dst_ips)}; do ping -c 10 -W 1 $ip | tail -n 2; echo ===; done'],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+            return proc.communicate()[0]
+        
+        # Each source host has its own shell, so the sources can ping concurrently
+        if self.parallel_latency:
+            with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+                ping_outputs = list(pool.map(ping_destinations, sources))
+        else:
+            ping_outputs = [ping_destinations(source) for source in sources]
         
-        for i, src_name in enumerate(hosts):
-            for dst_name in hosts[i+1:]:
-                src = self.net.get(src_name)
-                dst_ip = f"10.0.0.{dst_name[1]}"
-                
-                # Run multiple ping tests for accuracy
-                ping_result = src.cmd(f'ping -c 10 -W 1 {dst_ip}')
-                
+        for (src_name, dst_names, dst_ips), ping_output in zip(sources, ping_outputs):
+            for dst_name, dst_ip, ping_result in zip(dst_names, dst_ips, ping_output.split('===')):
                 packet_loss = self.parse_packet_loss(ping_result)
-                avg_latency = self.parse_avg_latency(ping_result)
-                min_latency = self.parse_min_latency(ping_result)
-                max_latency = self.parse_max_latency(ping_result)
+                min_latency, avg_latency, max_latency = self.parse_rtt(ping_result)
                 jitter = max_latency - min_latency if max_latency > 0 and min_latency > 0 else 0
                 
                 test_result = {
@@ -800,27 +492,29 @@ class MLPerformanceTester:
             {'name': 'ml_realtime_traffic', 'port': 7777, 'duration': 10, 'expected_priority': 'high'}
         ]
         
+        h1 = self.hosts['h1']
+        h2 = self.hosts['h2']
+        
+        # Start every iperf3 server up front; same tool and JSON report as the rule tester
+        servers = [h2.popen(['iperf3', '-s', '-p', str(scenario['port'])],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                   for scenario in test_scenarios]
+        time.sleep(2)
+        
         for scenario in test_scenarios:
             info(f"Testing {scenario['name']} throughput...\n")
             
-            h1 = self.net.get('h1')
-            h2 = self.net.get('h2')
-            
-            # Start iperf server
-            h2.cmd(f'iperf -s -p {scenario["port"]} > /tmp/iperf_server_{scenario["port"]}.log 2>&1 &')
-            time.sleep(2)
-            
-            # Run iperf client test (this will generate traffic for ML to classify)
-            start_time = time.time()
-            iperf_result = h1.cmd(f'iperf -c 10.0.0.2 -p {scenario["port"]} -t {scenario["duration"]} -i 1')
-            end_time = time.time()
-            
-            throughput_mbps = self.parse_iperf_throughput(iperf_result)
-            actual_duration = end_time - start_time
+            # Run iperf3 client test (this will generate traffic for ML to classify);
+            # the warm-up ping gets flow setup out of the timed window, as in the rule tester
+            self.warmup(h1, h2)
+            start_time = time.perf_counter()
+            client = h1.popen(['iperf3', '-c', '10.0.0.2', '-p', str(scenario['port']),
+                               '-t', str(scenario['duration']), '-J'],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            iperf_result = client.communicate()[0]
+            actual_duration = time.perf_counter() - start_time
             
-            # Stop server
-            h2.cmd(f'pkill -f "iperf.*{scenario["port"]}" || true')
-            time.sleep(1)
+            throughput_mbps = self.parse_iperf_json(iperf_result)
             
             # Calculate efficiency (cap at 100% for realistic reporting)
             raw_efficiency = (throughput_mbps / 100.0) * 100 if throughput_mbps > 0 else 0
@@ -842,6 +536,11 @@ class MLPerformanceTester:
             results['results'].append(test_result)
             info(f"✓ {scenario['name']}: {throughput_mbps:.2f} Mbps ({efficiency:.1f}% efficiency, {raw_efficiency:.1f}% raw)\n")
         
+        # Stop servers
+        for server in servers:
+            server.terminate()
+            server.wait()
+        
         self.save_results('ml_enhanced_throughput', results)
         return results
     
@@ -867,7 +566,7 @@ class MLPerformanceTester:
         for test in priority_tests:
             info(f"Testing {test['name']} under load...\n")
             
-            h1, h2, h3, h4 = self.net.get('h1', 'h2', 'h3', 'h4')
+            h1, h2, h3, h4 = (self.hosts[name] for name in ('h1', 'h2', 'h3', 'h4'))
             
             # Generate background traffic load
             info("  Starting background traffic for ML to classify...\n")
@@ -883,18 +582,18 @@ class MLPerformanceTester:
                 
                 if test['port'] == 53:
                     # DNS-like traffic (should get high ML priority)
-                    h1.cmd('nslookup google.com 8.8.8.8 > /dev/null 2>&1')
+                    self.run_on(h1, ['nslookup', 'google.com', '8.8.8.8'])
                     response_time = (time.time() - start_time) * 1000
                 elif test['port'] in [8080, 9999, 12345]:
                     # TCP connection test
                     h2.cmd(f'timeout 2 nc -l {test["port"]} > /dev/null 2>&1 &')
-                    result = h1.cmd(f'timeout 3 nc 10.0.0.2 {test["port"]} < /dev/null > /dev/null 2>&1')
+                    self.run_on(h1, ['timeout', '3', 'nc', '10.0.0.2', str(test['port'])])
                     response_time = (time.time() - start_time) * 1000
-                    h2.cmd('pkill -f nc || true')
+                    h2.cmd(f"pkill -f '{_NC_PATTERN}' || true")
                 else:
                     # Ping test
-                    ping_result = h1.cmd('ping -c 1 -W 2 10.0.0.2')
-                    response_time = self.parse_avg_latency(ping_result)
+                    ping_result = self.run_on(h1, ['ping', '-c', '1', '-W', '2', '10.0.0.2'], capture=True)
+                    response_time = self.parse_rtt(ping_result)[1]
                 
                 response_times.append(response_time)
                 time.sleep(1)
@@ -923,44 +622,56 @@ class MLPerformanceTester:
         self.save_results('ml_qos_effectiveness', results)
         return results
     
+    def controller_log_contains(self, marker):
+        """Check whether the controller log contains a marker line"""
+        try:
+            with open(self.controller_log_path) as f:
+                return marker in f.read()
+        except OSError:
+            return False
+    
+    def parse_controller_performance(self):
+        """Parse the latest 'ML Performance' report from the controller log"""
+        try:
+            with open(self.controller_log_path) as f:
+                reports = _RE_ML_PERF.findall(f.read())
+        except OSError:
+            return None
+        if not reports:
+            return None
+        amortized_ms, total, avg_batch = reports[-1]
+        return {'amortized_time_ms': float(amortized_ms), 'total_classifications': int(total),
+                'avg_batch_size': float(avg_batch)}
+    
     def get_flow_count(self):
         """Get current flow table entry count"""
         try:
-            switch = self.net.get('s1')
-            result = switch.cmd('ovs-ofctl dump-flows s1 | wc -l')
-            return max(0, int(result.strip()) - 1)  # Subtract 1 for header
-        except:
+            output = subprocess.check_output(['ovs-ofctl', '-O', 'OpenFlow13', 'dump-flows', self.switch.name])
+            return max(0, output.count(b'\n') - 1)  # Subtract 1 for header
+        except (AttributeError, OSError, subprocess.CalledProcessError):
             return 0
     
     def parse_packet_loss(self, ping_output):
         """Parse packet loss from ping output"""
-        match = re.search(r'(\d+)% packet loss', ping_output)
+        match = _RE_LOSS.search(ping_output)
         return int(match.group(1)) if match else 100
     
-    def parse_avg_latency(self, ping_output):
-        """Parse average latency from ping output"""
-        match = re.search(r'rtt min/avg/max/mdev = [\d.]+/([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
+    def parse_rtt(self, ping_output):
+        """Parse (min, avg, max) latency from ping output in one regex pass"""
+        match = _RE_RTT.search(ping_output)
+        return tuple(map(float, match.groups())) if match else (0.0, 0.0, 0.0)
     
-    def parse_min_latency(self, ping_output):
-        """Parse minimum latency from ping output"""
-        match = re.search(r'rtt min/avg/max/mdev = ([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
-    
-    def parse_max_latency(self, ping_output):
-        """Parse maximum latency from ping output"""
-        match = re.search(r'rtt min/avg/max/mdev = [\d.]+/[\d.]+/([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
+    def parse_iperf_json(self, iperf_output):
+        """Parse received throughput (Mbps) from an iperf3 -J report"""
+        # A failed run carries an "error" key instead of "end"
+        try:
+            return json.loads(iperf_output)['end']['sum_received']['bits_per_second'] / 1e6
+        except (ValueError, KeyError, TypeError):
+            return 0.0
     
-    def parse_iperf_throughput(self, iperf_output):
-        """Parse throughput from iperf output"""
-        lines = iperf_output.split('\n')
-        for line in reversed(lines):  # Look from end for summary
-            if 'Mbits/sec' in line and 'sec' in line:
-                match = re.search(r'([\d.]+)\s+Mbits/sec', line)
-                if match:
-                    return float(match.group(1))
-        return 0.0
+    def warmup(self, src, dst):
+        """One throwaway ping so flow setup happens before the timed window"""
+        src.cmd(f'ping -c 1 -W 1 {dst.IP()} > /dev/null 2>&1')
     
     def save_results(self, test_name, results):
         """Save test results to JSON and CSV"""
@@ -968,61 +679,22 @@ class MLPerformanceTester:
         
         # Save JSON
         json_file = f"{self.results_dir}/{test_name}_{timestamp}.json"
-        with open(json_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        with open(json_file, 'wb') as f:
+            if orjson is not None:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(results, indent=2).encode())
         
         # Save CSV based on test type
-        csv_file = f"{self.results_dir}/{test_name}_{timestamp}.csv"
+        columns = CSV_COLUMNS.get(test_name)
+        if columns is None:
+            return
         
-        if test_name == 'ml_classification_accuracy':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['traffic_type', 'expected_class', 'port_used', 'generation_time_sec', 'classification_method'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['traffic_type'], result['expected_class'], result['port_used'],
-                        result['generation_time_sec'], result['classification_method']
-                    ])
-        
-        elif test_name == 'ml_processing_performance':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['scenario', 'connections_per_second', 'avg_classification_time_ms', 'ml_model_type'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['scenario'], result['connections_per_second'],
-                        result['avg_classification_time_ms'], result['ml_model_type']
-                    ])
-        
-        elif test_name == 'ml_enhanced_latency':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['src', 'dst', 'avg_latency_ms', 'jitter_ms', 'packet_loss_percent', 'qos_method'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['src'], result['dst'], result['avg_latency_ms'],
-                        result['jitter_ms'], result['packet_loss_percent'], result['qos_method']
-                    ])
-        
-        elif test_name == 'ml_enhanced_throughput':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['scenario', 'throughput_mbps', 'efficiency_percent', 'expected_ml_priority', 'classification_method'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['scenario'], result['throughput_mbps'], result['efficiency_percent'],
-                        result['expected_ml_priority'], result['classification_method']
-                    ])
-        
-        elif test_name == 'ml_qos_effectiveness':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['traffic_type', 'expected_ml_class', 'avg_response_time_ms', 'classification_method'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['traffic_type'], result['expected_ml_class'],
-                        result['avg_response_time_ms'], result['classification_method']
-                    ])
+        csv_file = f"{self.results_dir}/{test_name}_{timestamp}.csv"
+        with open(csv_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows([[result[column] for column in columns] for result in results['results']])
     
     def generate_ml_performance_summary(self, all_results):
         """Generate comprehensive ML performance summary"""
@@ -1057,14 +729,15 @@ class MLPerformanceTester:
             # Latency Performance
             if 'ml_enhanced_latency' in all_results:
                 latency_data = all_results['ml_enhanced_latency']['results']
-                avg_latencies = [r['avg_latency_ms'] for r in latency_data]
-                avg_jitters = [r['jitter_ms'] for r in latency_data]
-                packet_losses = [r['packet_loss_percent'] for r in latency_data]
                 
                 f.write("--- ML-ENHANCED LATENCY PERFORMANCE ---\n")
-                f.write(f"Average Latency: {sum(avg_latencies)/len(avg_latencies):.2f} ms\n")
-                f.write(f"Average Jitter: {sum(avg_jitters)/len(avg_jitters):.2f} ms\n")
-                f.write(f"Average Packet Loss: {sum(packet_losses)/len(packet_losses):.2f}%\n\n")
+                for label, key, unit in (('Latency', 'avg_latency_ms', ' ms'), ('Jitter', 'jitter_ms', ' ms'),
+                                         ('Packet Loss', 'packet_loss_percent', '%')):
+                    values = np.fromiter((r[key] for r in latency_data), dtype=np.float32, count=len(latency_data))
+                    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                    f.write(f"Average {label}: {values.mean():.2f}{unit}\n")
+                    f.write(f"  std {values.std():.2f}{unit}, p50 {p50:.2f}{unit}, p95 {p95:.2f}{unit}, p99 {p99:.2f}{unit}\n")
+                f.write("\n")
             
             # Throughput Performance
             if 'ml_enhanced_throughput' in all_results:
@@ -1104,9 +777,7 @@ class MLPerformanceTester:
         if self.net:
             # Kill any remaining processes
             for host in self.net.hosts:
-                host.cmd('pkill -f iperf || true')
-                host.cmd('pkill -f nc || true')
-                host.cmd('pkill -f python3 || true')
+                host.cmd(f"pkill -f '{_KILL_PATTERNS}' || true")
             self.net.stop()
         
         if self.controller_process:
@@ -1134,7 +805,8 @@ class MLPerformanceTester:
             
             # Wait for network and ML model to fully initialize
             info("Waiting for network and ML model to fully initialize...\n")
-            time.sleep(8)
+            if not self.wait_until(lambda: self.get_flow_count() > 0, timeout=8):
+                info("⚠️  No flow entries installed yet, continuing anyway\n")
             
             # Run ML-specific performance tests
             info("=== RUNNING ML PERFORMANCE TEST SUITE ===\n")
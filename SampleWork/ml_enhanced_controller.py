@@ -9,27 +9,312 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ipv4, tcp, udp, icmp
-from ryu.lib.packet import ether_types
+from ryu.lib.packet import packet, ipv4, tcp, udp
+from ryu.lib.packet import ether_types, in_proto
+from ryu.lib import addrconv, hub
+import ctypes
+import glob
+import json
+import math
+import struct
+import subprocess
 import time
 import pickle
 import numpy as np
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 import os
 
+# Inference runs one small batch at a time on Ryu's single event loop, where
+# an OpenMP thread team per call costs more than it saves; must be set
+# before XGBoost loads its OpenMP runtime
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; preprocessing then runs as NumPy ufuncs
+    njit = None
+
+try:
+    import xgboost as xgb
+except ImportError:  # only needed to load the native booster export
+    xgb = None
+
+try:
+    from cuml import ForestInference
+except ImportError:  # RAPIDS is optional; the background flow refresh is then off
+    ForestInference = None
+
+try:
+    import treelite
+    import tl2cgen
+except ImportError:  # Treelite is optional; inference then goes through XGBoost
+    treelite = tl2cgen = None
+
+# Feature vector layout fed to the model (one float32 column each)
+MODEL_FEATURES = [
+    'packet_length', 'ip_proto', 'ip_ttl', 'ip_len', 'src_port', 'dst_port',
+    'tcp_window', 'tcp_flags', 'tcp_fin', 'tcp_syn', 'tcp_rst', 'tcp_psh',
+    'tcp_ack', 'tcp_urg', 'flow_duration', 'flow_packet_count', 'flow_byte_count',
+    'avg_inter_arrival', 'std_inter_arrival', 'avg_packet_size', 'std_packet_size',
+    'packet_rate', 'byte_rate'
+]
+FEATURE_INDEX = {name: i for i, name in enumerate(MODEL_FEATURES)}
+PORT_COLUMNS = [FEATURE_INDEX['src_port'], FEATURE_INDEX['dst_port']]
+
+# Precompiled header layouts for parsing packet-ins without ryu.lib.packet
+ETH_HEADER = struct.Struct('!6s6sH')
+IPV4_HEADER = struct.Struct('!BBHHHBBH4s4s')
+TCP_HEADER = struct.Struct('!HHLLBBHHH')
+UDP_HEADER = struct.Struct('!HHHH')
+VLAN_ETHERTYPES = (ether_types.ETH_TYPE_8021Q, ether_types.ETH_TYPE_8021AD)
+
+# Header tuple: (ip_proto, ttl, ip_len, src_port, dst_port, tcp_window, tcp_bits),
+# with the L4 fields None when the packet carries no TCP/UDP header
+def parse_headers(data, ethertype):
+    """IPv4/L4 header tuple read straight from the frame bytes; None if not IPv4"""
+    if ethertype in VLAN_ETHERTYPES:
+        # Tagged frames are rare here; let Ryu walk the tag stack
+        return ryu_headers(packet.Packet(data))
+    if ethertype != ether_types.ETH_TYPE_IP or len(data) < ETH_HEADER.size + IPV4_HEADER.size:
+        return None
+    
+    ver_ihl, _, ip_len, _, _, ttl, proto, _, _, _ = IPV4_HEADER.unpack_from(data, ETH_HEADER.size)
+    l4 = ETH_HEADER.size + (ver_ihl & 0x0F) * 4
+    
+    if proto == in_proto.IPPROTO_TCP and len(data) >= l4 + TCP_HEADER.size:
+        src_port, dst_port, _, _, _, bits, window, _, _ = TCP_HEADER.unpack_from(data, l4)
+        return proto, ttl, ip_len, src_port, dst_port, window, bits
+    if proto == in_proto.IPPROTO_UDP and len(data) >= l4 + UDP_HEADER.size:
+        src_port, dst_port, _, _ = UDP_HEADER.unpack_from(data, l4)
+        return proto, ttl, ip_len, src_port, dst_port, None, None
+    return proto, ttl, ip_len, None, None, None, None
+
+def ryu_headers(pkt):
+    """Same tuple as parse_headers() from a fully parsed Ryu packet"""
+    ipv4_pkt = pkt.get_protocol(ipv4.ipv4)
+    if ipv4_pkt is None:
+        return None
+    
+    headers = (ipv4_pkt.proto, ipv4_pkt.ttl, ipv4_pkt.total_length)
+    tcp_pkt = pkt.get_protocol(tcp.tcp)
+    if tcp_pkt is not None:
+        return headers + (tcp_pkt.src_port, tcp_pkt.dst_port, tcp_pkt.window_size, tcp_pkt.bits)
+    udp_pkt = pkt.get_protocol(udp.udp)
+    if udp_pkt is not None:
+        return headers + (udp_pkt.src_port, udp_pkt.dst_port, None, None)
+    return headers + (None, None, None, None)
+
+def flow_signature(headers):
+    """(ip_proto, low port, high port) of a TCP/UDP packet, None otherwise"""
+    if headers is None or headers[3] is None:
+        return None
+    
+    # Both directions of a conversation share one entry
+    proto, _, _, src_port, dst_port = headers[:5]
+    return proto, min(src_port, dst_port), max(src_port, dst_port)
+
+NS_PER_SECOND = 1e9
+
+class FlowStat:
+    """Per-flow counters kept in the flow table (times in monotonic ns)"""
+    __slots__ = ('packet_count', 'byte_count', 'start_time', 'last_packet_time',
+                 'inter_arrival_moments', 'packet_size_moments',
+                 'last_headers', 'last_length')
+
+    def __init__(self, now):
+        self.packet_count = 0
+        self.byte_count = 0
+        self.start_time = now
+        self.last_packet_time = now
+        # Running [count, mean, M2] of inter-arrival time and packet size
+        self.inter_arrival_moments = [0, 0.0, 0.0]
+        self.packet_size_moments = [0, 0.0, 0.0]
+        # Most recent packet, so the flow can be re-scored later
+        self.last_headers = None
+        self.last_length = 0
+
+def write_flow_features(row, headers, pkt_len, flow_stat, now_ns):
+    """Write one packet's header and flow-level features into a feature-buffer row"""
+    idx = FEATURE_INDEX
+    row.fill(0)  # features a packet doesn't carry stay 0
+    
+    # Basic packet features
+    row[idx['packet_length']] = pkt_len
+    
+    # Protocol analysis
+    if headers is not None:
+        proto, ttl, ip_len, src_port, dst_port, window, bits = headers
+        row[idx['ip_proto']] = proto
+        row[idx['ip_ttl']] = ttl
+        row[idx['ip_len']] = ip_len
+        
+        # TCP/UDP ports
+        if src_port is not None:
+            row[idx['src_port']] = src_port
+            row[idx['dst_port']] = dst_port
+        
+        # TCP features
+        if bits is not None:
+            row[idx['tcp_window']] = window
+            row[idx['tcp_flags']] = bits
+            
+            # TCP flag analysis (shift/mask each bit, no branches)
+            row[idx['tcp_fin']] = bits & 1
+            row[idx['tcp_syn']] = (bits >> 1) & 1
+            row[idx['tcp_rst']] = (bits >> 2) & 1
+            row[idx['tcp_psh']] = (bits >> 3) & 1
+            row[idx['tcp_ack']] = (bits >> 4) & 1
+            row[idx['tcp_urg']] = (bits >> 5) & 1
+    
+    # Flow statistical features
+    flow_duration = (now_ns - flow_stat.start_time) / NS_PER_SECOND
+    row[idx['flow_duration']] = flow_duration
+    row[idx['flow_packet_count']] = flow_stat.packet_count
+    row[idx['flow_byte_count']] = flow_stat.byte_count
+    
+    # Population std (M2 / n), matching the np.std values used before
+    n, mean, m2 = flow_stat.inter_arrival_moments
+    if n > 1:
+        row[idx['avg_inter_arrival']] = mean
+        row[idx['std_inter_arrival']] = math.sqrt(m2 / n)
+    
+    n, mean, m2 = flow_stat.packet_size_moments
+    if n > 1:
+        row[idx['avg_packet_size']] = mean
+        row[idx['std_packet_size']] = math.sqrt(m2 / n)
+    else:
+        row[idx['avg_packet_size']] = pkt_len
+    
+    # Packet rate features
+    if flow_duration > 0:
+        row[idx['packet_rate']] = flow_stat.packet_count / flow_duration
+        row[idx['byte_rate']] = flow_stat.byte_count / flow_duration
+
+if njit is not None:
+    @njit(cache=True)
+    def standardize_select(buf, mean, scale, sel_idx, out):
+        """out[r, k] = (buf[r, sel_idx[k]] - mean[k]) / scale[k] in a single pass"""
+        for r in range(out.shape[0]):
+            for k in range(sel_idx.shape[0]):
+                out[r, k] = (buf[r, sel_idx[k]] - mean[k]) / scale[k]
+else:
+    def standardize_select(buf, mean, scale, sel_idx, out):
+        """out[r, k] = (buf[r, sel_idx[k]] - mean[k]) / scale[k] with in-place ufuncs"""
+        np.take(buf, sel_idx, axis=1, out=out)
+        np.subtract(out, mean, out=out)
+        np.divide(out, scale, out=out)
+
+def update_moments(moments, value):
+    """Welford update of a running [count, mean, M2] triple"""
+    n, mean, m2 = moments
+    n += 1
+    delta = value - mean
+    mean += delta / n
+    moments[0], moments[1], moments[2] = n, mean, m2 + delta * (value - mean)
+
+# Entry point compiled next to the Treelite-generated sources: the scaler
+# constants and column selection are baked in for the fixed 23-float row
+SPECIALIZED_SOURCE = """
+#include <stddef.h>
+#include "header.h"
+
+#define N_INPUTS {n_inputs}
+#define N_CLASS {n_class}
+
+static const int SEL[N_INPUTS] = {{{sel}}};
+static const float MEAN[N_INPUTS] = {{{mean}}};
+static const float SCALE[N_INPUTS] = {{{scale}}};
+
+void classify_batch(const float *x, int n_rows, int row_len, float *proba) {{
+    union Entry entry[N_INPUTS];
+    for (int r = 0; r < n_rows; ++r) {{
+        const float *row = x + (size_t)r * row_len;
+        for (int k = 0; k < N_INPUTS; ++k)
+            entry[k].fvalue = (row[SEL[k]] - MEAN[k]) / SCALE[k];
+        predict(entry, 0, proba + (size_t)r * N_CLASS);
+    }}
+}}
+"""
+
+def predictor_proba(raw, n_rows):
+    """Per-row class probabilities from a Treelite prediction of any output rank"""
+    proba = np.asarray(raw, dtype=np.float32).reshape(n_rows, -1)
+    if proba.shape[1] == 1:  # binary models only report P(class 1)
+        proba = np.hstack((1 - proba, proba))
+    return proba
+
+def margin_proba(margins, n_rows):
+    """Class probabilities from raw XGBoost margins (softmax; sigmoid for binary)"""
+    margins = np.asarray(margins, dtype=np.float32).reshape(n_rows, -1)
+    if margins.shape[1] == 1:  # binary margin is the logit of class 1
+        margins = np.hstack((np.zeros_like(margins), margins))
+    exp = np.exp(margins - margins.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
 class MLEnhancedController(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
+    
+    # Packet-ins are classified in micro-batches: a batch runs once it holds
+    # BATCH_MAX flows, or BATCH_INTERVAL seconds after the previous one
+    BATCH_MAX = 64
+    BATCH_INTERVAL = 0.002  # seconds
+    
+    # Flow state bounds: hard size cap plus a periodic purge of idle flows
+    FLOW_TABLE_CAP = 100000
+    FLOW_IDLE_TIMEOUT = 60  # seconds
+    FLOW_SWEEP_INTERVAL = 10  # seconds
+    
+    # Classification decisions remembered per (ip_proto, low port, high port)
+    DECISION_CACHE_SIZE = 8192
+    
+    # Traffic class -> base OpenFlow priority (anything else gets 1000)
+    BASE_PRIORITY = {
+        # High priority traffic types
+        'DNS': 3000, 'VOIP': 3000, 'Video-Streaming': 3000,
+        'Audio-Streaming': 3000, 'Chat': 3000,
+        # Medium priority traffic types
+        'Browsing': 2000, 'Email': 2000, 'SSH': 2000,
+        # Low priority traffic types
+        'File-Transfer': 1000, 'P2P': 1000, 'Bulk': 1000,
+    }
+    
+    # With a GPU forest predictor, every active flow is re-scored this often
+    FLOW_REFRESH_INTERVAL = 5  # seconds
+    
+    # Outgoing OpenFlow messages are coalesced per switch and flushed on a
+    # short timer, or as soon as a batch fills up
+    SEND_BATCH_SIZE = 32
+    SEND_FLUSH_INTERVAL = 0.001  # seconds
+    
+    # Well-known ports whose class is certain enough to skip ML entirely
+    FAST_PATH_PORTS = {53: 'DNS', 22: 'SSH'}
+    FAST_PATH_CONFIDENCE = 0.95
 
     def __init__(self, *args, **kwargs):
         super(MLEnhancedController, self).__init__(*args, **kwargs)
         self.mac_to_port = {}
-        self.flow_stats = defaultdict(dict)
-        self.flow_features = defaultdict(list)
+        
+        # Per-datapath send queues, sent in queue order. Fast-path and cache-hit
+        # flows queue their flow entry before the packet-out; ML-classified flows
+        # queue it when their batch runs, after this packet's packet-out
+        self._pending_msgs = defaultdict(list)
+        self._pending_datapaths = {}
+        self._send_flusher = hub.spawn(self._flush_loop)
+        self.flow_stats = OrderedDict()  # LRU order: least recently seen flow first
         
         # ML Model components
         self.model_loaded = False
         self.ml_model = None
+        self.booster = None
+        self.tl_predictor = None
+        self.fil = None
+        self._specialized = None
         self.scaler = None
+        self.feature_bins = None
+        self._mean = self._scale = None
+        # Model input columns (indices into MODEL_FEATURES) with their scaler constants
+        self._sel_idx = np.arange(len(MODEL_FEATURES), dtype=np.int64)
+        self._sel_mean = self._sel_scale = None
         self.label_encoder = None
         self.feature_selector = None
         self.selected_features = None
@@ -38,40 +323,204 @@ class MLEnhancedController(app_manager.RyuApp):
         # Performance tracking
         self.classification_count = 0
         self.classification_successes = 0
-        self.ml_processing_times = []
+        self.batch_count = 0
+        # Most recent processing times, with a running sum for O(1) averages
+        self.ml_processing_times = deque(maxlen=1024)
+        self._mpt_sum = 0.0
         
         # Load trained ML model
         self.load_ml_model()
         
+        # Flows waiting for the next batched classification; row i of
+        # _feat_buf holds the features of _pending[i]
+        self._pending = []
+        self._decision_cache = OrderedDict()
+        self._fast_path = {
+            port: (traffic_class, self.FAST_PATH_CONFIDENCE,
+                   self.get_priority_from_ml_classification(traffic_class, self.FAST_PATH_CONFIDENCE))
+            for port, traffic_class in self.FAST_PATH_PORTS.items()
+        }
+        self._feat_buf = np.zeros((self.BATCH_MAX, len(MODEL_FEATURES)), dtype=np.float32)
+        self._scaled_buf = np.empty((self.BATCH_MAX, len(self._sel_idx)), dtype=np.float32)
+        self._quant_buf = np.empty(self._scaled_buf.shape, dtype=np.uint8)
+        self._proba_buf = np.empty((self.BATCH_MAX, 0 if self.class_names is None else len(self.class_names)), dtype=np.float32)
+        self._batcher = hub.spawn(self._batch_loop)
+        self._flow_sweeper = hub.spawn(self._sweep_loop)
+        if self.fil is not None:
+            self._flow_refresher = hub.spawn(self._refresh_loop)
+        
     def load_ml_model(self):
         """Load the trained XGBoost model and preprocessing components"""
         model_path = 'optimized_xgboost_traffic_classifier.pkl'
+        base_path = os.path.splitext(model_path)[0]
+        native_path, preprocess_path = base_path + '.ubj', base_path + '.npz'
         
         try:
-            if os.path.exists(model_path):
+            # Prefer the native booster + .npz export (see export_native_model.py)
+            if xgb is not None and os.path.exists(native_path) and os.path.exists(preprocess_path):
+                self.load_native_model(native_path, preprocess_path)
+                model_path = native_path
+                
+            elif os.path.exists(model_path):
                 with open(model_path, 'rb') as f:
                     model_artifacts = pickle.load(f)
                 
                 self.ml_model = model_artifacts['model']
                 self.scaler = model_artifacts['scaler']
+                self._mean, self._scale = self.scaler_arrays(self.scaler)
                 self.label_encoder = model_artifacts['label_encoder']
                 self.feature_selector = model_artifacts['feature_selector']
                 self.selected_features = model_artifacts['selected_features']
                 self.class_names = model_artifacts['class_names']
-                
-                self.model_loaded = True
-                self.logger.info(f"✓ ML model loaded successfully from {model_path}")
-                self.logger.info(f"Model can classify {len(self.class_names)} traffic types")
-                self.logger.info(f"Using {len(self.selected_features)} features")
+                # Optional per-feature bin edges for models trained on uint8 inputs
+                self.feature_bins = model_artifacts.get('feature_bins')
+                self.booster = self.ml_model.get_booster()
                 
             else:
                 self.logger.warning(f"ML model file not found: {model_path}")
                 self.logger.warning("Falling back to basic classification")
+                return
+            
+            self.prepare_model_inputs()
+            self.booster.set_param({'nthread': 1})
+            self.logger.info(f"✓ XGBoost inference pinned to nthread=1 (OMP_NUM_THREADS={os.environ.get('OMP_NUM_THREADS')})")
+            self.tl_predictor = self.load_compiled_model(model_path)
+            self._specialized = self.build_specialized_predictor(model_path)
+            self.pin_to_core()
+            self.fil = self.load_fil(native_path)
+            
+            self.model_loaded = True
+            self.logger.info(f"✓ ML model loaded successfully from {model_path}")
+            self.logger.info(f"Model can classify {len(self.class_names)} traffic types")
+            self.logger.info(f"Using {len(self.selected_features)} features")
+            self.logger.info(f"Feature scaling kernel: {'numba' if njit is not None else 'numpy'}")
                 
         except Exception as e:
             self.logger.error(f"Failed to load ML model: {e}")
             self.model_loaded = False
     
+    def load_native_model(self, native_path, preprocess_path):
+        """Load the booster in XGBoost's native format and preprocessing arrays from .npz"""
+        self.booster = xgb.Booster()
+        self.booster.load_model(native_path)
+        
+        with np.load(preprocess_path, allow_pickle=False) as pre:
+            self._mean = pre['mean'].astype(np.float32)
+            self._scale = pre['scale'].astype(np.float32)
+            self.class_names = pre['class_names'].tolist()
+            self.selected_features = pre['selected_features'].tolist()
+            bin_keys = sorted((key for key in pre.files if key.startswith('feature_bins_')),
+                              key=lambda key: int(key.rsplit('_', 1)[1]))
+            self.feature_bins = [pre[key] for key in bin_keys] or None
+    
+    def prepare_model_inputs(self):
+        """Resolve the selected-feature columns and their scaler constants once"""
+        selected = list(self.selected_features or [])
+        if selected and all(name in FEATURE_INDEX for name in selected):
+            self._sel_idx = np.array([FEATURE_INDEX[name] for name in selected], dtype=np.int64)
+        
+        # The scaler is fitted on the full MODEL_FEATURES vector; a model trained on
+        # another feature set leaves these unset and classification reports the mismatch
+        if len(self._mean) == len(MODEL_FEATURES):
+            self._sel_mean = np.ascontiguousarray(self._mean[self._sel_idx])
+            self._sel_scale = np.ascontiguousarray(self._scale[self._sel_idx])
+    
+    def load_fil(self, native_path):
+        """GPU forest predictor for bulk flow re-scoring (None without RAPIDS/GPU)"""
+        if ForestInference is None or not os.path.exists(native_path):
+            return None
+        
+        try:
+            fil = ForestInference.load(native_path, output_class=True, model_type='xgboost_ubj')
+            self.logger.info(f"✓ GPU forest predictor loaded from {native_path}")
+            return fil
+        except Exception as e:
+            self.logger.warning(f"GPU forest predictor unavailable: {e}")
+            return None
+    
+    def pin_to_core(self):
+        """Pin the controller to a single core so the predictor's caches stay warm"""
+        if not hasattr(os, 'sched_setaffinity'):
+            return
+        
+        try:
+            core = max(os.sched_getaffinity(0))
+            os.sched_setaffinity(0, {core})
+            self.logger.info(f"Controller pinned to CPU core {core}")
+        except OSError as e:
+            self.logger.warning(f"Could not pin controller to a core: {e}")
+    
+    def scaler_arrays(self, scaler):
+        """StandardScaler's mean/scale as float32 arrays for in-place scaling"""
+        n_features = scaler.n_features_in_
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        return mean.astype(np.float32), scale.astype(np.float32)
+    
+    def load_compiled_model(self, model_path):
+        """Compile the booster to a native Treelite library, reusing a cached build"""
+        if tl2cgen is None:
+            return None
+        
+        lib_path = os.path.splitext(model_path)[0] + '.so'
+        try:
+            # Only recompile when the pickled model is newer than the library
+            if not os.path.exists(lib_path) or os.path.getmtime(lib_path) < os.path.getmtime(model_path):
+                tl_model = treelite.Model.from_xgboost(self.booster)
+                tl2cgen.export_lib(tl_model, toolchain='gcc', libpath=lib_path,
+                                   params={'parallel_comp': 0, 'quantize': 1})
+            
+            predictor = tl2cgen.Predictor(lib_path, nthread=1)
+            self.logger.info(f"✓ Treelite predictor loaded from {lib_path} (quantize=1)")
+            return predictor
+            
+        except Exception as e:
+            self.logger.warning(f"Treelite compilation failed, using XGBoost predictor: {e}")
+            return None
+    
+    def build_specialized_predictor(self, model_path):
+        """Compile scaler constants + Treelite trees into one fixed-shape C entry point"""
+        if tl2cgen is None or self._sel_mean is None or self.feature_bins is not None:
+            return None
+        if self.booster.num_features() != len(self._sel_idx):
+            return None
+        
+        # The C entry point writes N_CLASS floats per row. Binary models emit a single
+        # P(class 1) per row (num_class 0), so that stride only fits multi-class models
+        n_outputs = int(json.loads(self.booster.save_config())['learner']['learner_model_param']['num_class'])
+        if n_outputs != len(self.class_names):
+            self.logger.info(f"Specialized predictor skipped: model has {max(n_outputs, 1)} output(s) per row "
+                             f"for {len(self.class_names)} classes")
+            return None
+        
+        base_path = os.path.splitext(model_path)[0]
+        lib_path = base_path + '_specialized.so'
+        try:
+            # Only regenerate when the model is newer than the library
+            if not os.path.exists(lib_path) or os.path.getmtime(lib_path) < os.path.getmtime(model_path):
+                src_dir = base_path + '_specialized_src'
+                tl_model = treelite.Model.from_xgboost(self.booster)
+                tl2cgen.generate_c_code(tl_model, dirpath=src_dir, params={'quantize': 1})
+                with open(os.path.join(src_dir, 'classify.c'), 'w') as f:
+                    f.write(SPECIALIZED_SOURCE.format(
+                        n_inputs=len(self._sel_idx), n_class=n_outputs,
+                        sel=', '.join(str(i) for i in self._sel_idx),
+                        mean=', '.join(repr(float(v)) for v in self._sel_mean),
+                        scale=', '.join(repr(float(v)) for v in self._sel_scale)))
+                subprocess.run(['gcc', '-O3', '-march=native', '-ffast-math', '-shared', '-fPIC',
+                                '-o', lib_path] + glob.glob(os.path.join(src_dir, '*.c')),
+                               check=True, capture_output=True)
+            
+            classify = ctypes.CDLL(os.path.abspath(lib_path)).classify_batch
+            classify.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+            classify.restype = None
+            self.logger.info(f"✓ Specialized predictor loaded from {lib_path}")
+            return classify
+            
+        except Exception as e:
+            self.logger.warning(f"Specialized predictor unavailable: {e}")
+            return None
+    
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
         datapath = ev.msg.datapath
@@ -95,182 +544,242 @@ class MLEnhancedController(app_manager.RyuApp):
         else:
             mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
                                   match=match, instructions=inst)
-        datapath.send_msg(mod)
-
-    def extract_flow_features(self, pkt, in_port, eth_src, eth_dst):
-        """Extract flow-level features for ML classification"""
-        features = {}
-        current_time = time.time()
-        
-        # Basic packet features
-        features['packet_length'] = len(pkt.data)
-        features['in_port'] = in_port
-        
-        # Protocol analysis
-        ipv4_pkt = pkt.get_protocol(ipv4.ipv4)
-        if ipv4_pkt:
-            features['ip_proto'] = ipv4_pkt.proto
-            features['ip_ttl'] = ipv4_pkt.ttl
-            features['ip_len'] = ipv4_pkt.total_length
-            features['ip_flags'] = ipv4_pkt.flags
-            
-            # TCP features
-            tcp_pkt = pkt.get_protocol(tcp.tcp)
-            if tcp_pkt:
-                features['src_port'] = tcp_pkt.src_port
-                features['dst_port'] = tcp_pkt.dst_port
-                features['tcp_window'] = tcp_pkt.window_size
-                features['tcp_flags'] = tcp_pkt.bits
-                
-                # TCP flag analysis
-                features['tcp_fin'] = 1 if tcp_pkt.bits & 0x01 else 0
-                features['tcp_syn'] = 1 if tcp_pkt.bits & 0x02 else 0
-                features['tcp_rst'] = 1 if tcp_pkt.bits & 0x04 else 0
-                features['tcp_psh'] = 1 if tcp_pkt.bits & 0x08 else 0
-                features['tcp_ack'] = 1 if tcp_pkt.bits & 0x10 else 0
-                features['tcp_urg'] = 1 if tcp_pkt.bits & 0x20 else 0
-            
-            # UDP features
-            udp_pkt = pkt.get_protocol(udp.udp)
-            if udp_pkt:
-                features['src_port'] = udp_pkt.src_port
-                features['dst_port'] = udp_pkt.dst_port
-                features['udp_len'] = udp_pkt.total_length
-        
-        # Flow-based features (maintain flow state)
-        flow_key = f"{eth_src}-{eth_dst}"
-        
-        if flow_key not in self.flow_stats:
-            self.flow_stats[flow_key] = {
-                'packet_count': 0,
-                'byte_count': 0,
-                'start_time': current_time,
-                'last_packet_time': current_time,
-                'inter_arrival_times': [],
-                'packet_sizes': []
-            }
-        
-        flow_stat = self.flow_stats[flow_key]
-        flow_stat['packet_count'] += 1
-        flow_stat['byte_count'] += len(pkt.data)
-        
-        # Inter-arrival time
-        if flow_stat['last_packet_time']:
-            inter_arrival = current_time - flow_stat['last_packet_time']
-            flow_stat['inter_arrival_times'].append(inter_arrival)
-            features['inter_arrival_time'] = inter_arrival
-        else:
-            features['inter_arrival_time'] = 0
-        
-        flow_stat['last_packet_time'] = current_time
-        flow_stat['packet_sizes'].append(len(pkt.data))
-        
-        # Flow statistical features
-        features['flow_duration'] = current_time - flow_stat['start_time']
-        features['flow_packet_count'] = flow_stat['packet_count']
-        features['flow_byte_count'] = flow_stat['byte_count']
-        
-        if len(flow_stat['inter_arrival_times']) > 1:
-            features['avg_inter_arrival'] = np.mean(flow_stat['inter_arrival_times'])
-            features['std_inter_arrival'] = np.std(flow_stat['inter_arrival_times'])
-        else:
-            features['avg_inter_arrival'] = 0
-            features['std_inter_arrival'] = 0
-        
-        if len(flow_stat['packet_sizes']) > 1:
-            features['avg_packet_size'] = np.mean(flow_stat['packet_sizes'])
-            features['std_packet_size'] = np.std(flow_stat['packet_sizes'])
+        self.queue_msg(datapath, mod)
+
+    def queue_msg(self, datapath, msg):
+        """Queue an OpenFlow message for the next batched send to this switch"""
+        dpid = datapath.id
+        pending = self._pending_msgs[dpid]
+        self._pending_datapaths[dpid] = datapath
+        pending.append(msg)
+        if len(pending) >= self.SEND_BATCH_SIZE:
+            self.flush_msgs(dpid)
+
+    def flush_msgs(self, dpid):
+        """Send every queued message for one switch in order, closed by a barrier"""
+        msgs = self._pending_msgs.pop(dpid, None)
+        if msgs:
+            datapath = self._pending_datapaths[dpid]
+            for msg in msgs:
+                datapath.send_msg(msg)
+            datapath.send_msg(datapath.ofproto_parser.OFPBarrierRequest(datapath))
+
+    def _flush_loop(self):
+        while True:
+            hub.sleep(self.SEND_FLUSH_INTERVAL)
+            for dpid in list(self._pending_msgs):
+                self.flush_msgs(dpid)
+
+    def expire_idle_flows(self, now_ns):
+        """Drop flows idle for longer than FLOW_IDLE_TIMEOUT"""
+        # LRU order means the stalest flows are at the front
+        cutoff = now_ns - self.FLOW_IDLE_TIMEOUT * NS_PER_SECOND
+        while self.flow_stats:
+            oldest = next(iter(self.flow_stats.values()))
+            if oldest.last_packet_time >= cutoff:
+                break
+            self.flow_stats.popitem(last=False)
+
+    def _sweep_loop(self):
+        while True:
+            hub.sleep(self.FLOW_SWEEP_INTERVAL)
+            self.expire_idle_flows(time.monotonic_ns())
+
+    def update_flow_stats(self, flow_key, pkt_len, now_ns, headers):
+        """Count one packet against its flow's running state and return that state"""
+        flow_stat = self.flow_stats.get(flow_key)
+        if flow_stat is None:
+            flow_stat = self.flow_stats[flow_key] = FlowStat(now_ns)
+            if len(self.flow_stats) > self.FLOW_TABLE_CAP:
+                self.flow_stats.popitem(last=False)
         else:
-            features['avg_packet_size'] = len(pkt.data)
-            features['std_packet_size'] = 0
+            self.flow_stats.move_to_end(flow_key)
         
-        # Packet rate features
-        if features['flow_duration'] > 0:
-            features['packet_rate'] = flow_stat['packet_count'] / features['flow_duration']
-            features['byte_rate'] = flow_stat['byte_count'] / features['flow_duration']
-        else:
-            features['packet_rate'] = 0
-            features['byte_rate'] = 0
+        flow_stat.packet_count += 1
+        flow_stat.byte_count += pkt_len
         
-        return features
+        # Inter-arrival time
+        if flow_stat.last_packet_time:
+            update_moments(flow_stat.inter_arrival_moments,
+                           (now_ns - flow_stat.last_packet_time) / NS_PER_SECOND)
+        
+        flow_stat.last_packet_time = now_ns
+        update_moments(flow_stat.packet_size_moments, pkt_len)
+        flow_stat.last_headers = headers
+        flow_stat.last_length = pkt_len
+        return flow_stat
+
+    def extract_flow_features(self, headers, pkt_len, flow_key, row, now_ns):
+        """Write flow-level features for ML classification into one feature-buffer row"""
+        # Flow-based features (maintain flow state)
+        flow_stat = self.update_flow_stats(flow_key, pkt_len, now_ns, headers)
+        write_flow_features(row, headers, pkt_len, flow_stat, now_ns)
+
+    def quantize_features(self, feature_array, out=None):
+        """Map each feature column onto its bin index (np.digitize) in the uint8 buffer"""
+        quantized = self._quant_buf[:len(feature_array)] if out is None else out
+        for col, edges in enumerate(self.feature_bins):
+            quantized[:, col] = np.searchsorted(edges, feature_array[:, col], side='right')
+        return quantized
+
+    def record_processing_time(self, processing_time):
+        """Append to the processing-time window, keeping its running sum in step"""
+        if len(self.ml_processing_times) == self.ml_processing_times.maxlen:
+            self._mpt_sum -= self.ml_processing_times[0]  # about to be evicted
+        self.ml_processing_times.append(processing_time)
+        self._mpt_sum += processing_time
 
-    def prepare_features_for_model(self, raw_features):
-        """Prepare features for ML model prediction"""
+    def ml_classify_batch(self, feature_array):
+        """Use ML model to classify a batch of feature rows in one predictor call"""
+        n_rows = len(feature_array)
+        self.classification_count += n_rows
+        
         if not self.model_loaded:
-            return None
+            return [('unknown', 0.1, 'ML model not loaded')] * n_rows
+        
+        start_ns = time.monotonic_ns()
         
         try:
-            # Create feature vector with all possible features (fill missing with 0)
-            feature_dict = {}
-            
-            # Map raw features to expected model features
-            # This should match the features your model was trained on
-            expected_features = [
-                'packet_length', 'ip_proto', 'ip_ttl', 'ip_len', 'src_port', 'dst_port',
-                'tcp_window', 'tcp_flags', 'tcp_fin', 'tcp_syn', 'tcp_rst', 'tcp_psh', 
-                'tcp_ack', 'tcp_urg', 'flow_duration', 'flow_packet_count', 'flow_byte_count',
-                'avg_inter_arrival', 'std_inter_arrival', 'avg_packet_size', 'std_packet_size',
-                'packet_rate', 'byte_rate'
-            ]
+            if self._specialized is not None:
+                # Selection, scaling and tree traversal in one native call
+                prediction_proba = self._proba_buf[:n_rows]
+                self._specialized(feature_array.ctypes.data, n_rows, feature_array.shape[1],
+                                  prediction_proba.ctypes.data)
+            else:
+                # Select and scale the model's columns in one pass into the preallocated buffer
+                if self._sel_mean is None:
+                    raise ValueError(f"scaler expects {len(self._mean)} features, "
+                                     f"controller provides {len(MODEL_FEATURES)}")
+                scaled = self._scaled_buf[:n_rows]
+                standardize_select(feature_array, self._sel_mean, self._sel_scale, self._sel_idx, scaled)
+                feature_array = scaled
+                
+                # Bin features to uint8 when the model was trained on quantized inputs
+                if self.feature_bins is not None:
+                    feature_array = self.quantize_features(feature_array)
+                
+                # Predict with model (compiled Treelite library when available)
+                if self.tl_predictor is not None:
+                    dmat = tl2cgen.DMatrix(feature_array.astype(np.float32, copy=False))
+                    prediction_proba = predictor_proba(self.tl_predictor.predict(dmat), n_rows)
+                else:
+                    # One margin pass instead of separate predict + predict_proba traversals
+                    margins = self.booster.inplace_predict(feature_array, predict_type='margin')
+                    prediction_proba = margin_proba(margins, n_rows)
+            predictions = prediction_proba.argmax(axis=1)
+            confidences = prediction_proba[np.arange(n_rows), predictions]
             
-            # Fill feature vector
-            for feature in expected_features:
-                feature_dict[feature] = raw_features.get(feature, 0)
+            # Track processing time (per classification)
+            processing_time = (time.monotonic_ns() - start_ns) / NS_PER_SECOND
+            self.record_processing_time(processing_time / n_rows)
             
-            # Convert to array
-            feature_array = np.array([list(feature_dict.values())]).reshape(1, -1)
+            self.classification_successes += n_rows
             
-            return feature_array
+            return [(self.class_names[prediction], float(confidence),
+                     f'ML prediction (confidence: {confidence:.3f})')
+                    for prediction, confidence in zip(predictions, confidences)]
             
         except Exception as e:
-            self.logger.error(f"Feature preparation error: {e}")
-            return None
+            self.logger.error(f"ML classification error: {e}")
+            return [('unknown', 0.1, f'ML error: {str(e)}')] * n_rows
 
-    def ml_classify_traffic(self, pkt, raw_features):
-        """Use ML model to classify traffic"""
-        self.classification_count += 1
-        
-        if not self.model_loaded:
-            return 'unknown', 0.1, 'ML model not loaded'
-        
-        start_time = time.time()
-        
-        try:
-            # Prepare features
-            feature_array = self.prepare_features_for_model(raw_features)
-            if feature_array is None:
-                return 'unknown', 0.1, 'Feature preparation failed'
-            
-            # Scale features (if scaler available)
-            if self.scaler:
-                feature_array = self.scaler.transform(feature_array)
-            
-            # Predict with model
-            prediction = self.ml_model.predict(feature_array)[0]
-            prediction_proba = self.ml_model.predict_proba(feature_array)[0]
+    def classify_pending(self):
+        """Classify every queued flow in one batch and install the flow entries"""
+        batch, self._pending = self._pending, []
+        features = self._feat_buf[:len(batch)]
+        # Read the ports now: once flow-mods start going out, new packet-ins
+        # may reuse these buffer rows
+        ports = features[:, PORT_COLUMNS].astype(np.int64).tolist()
+        seen_before = self.classification_count
+        self.batch_count += 1
+        results = self.ml_classify_batch(features)
+        
+        for seq, (item, (src_port, dst_port), result) in enumerate(zip(batch, ports, results), seen_before + 1):
+            datapath, in_port, src, dst, actions, signature = item
+            traffic_class, confidence, method = result
             
-            # Get class name
-            predicted_class = self.class_names[prediction]
-            confidence = max(prediction_proba)
+            # Fallback if ML classification has low confidence
+            if confidence < 0.3:
+                traffic_class, confidence, method = self.fallback_classify_traffic(src_port, dst_port)
+                method = f"Fallback after ML: {method}"
             
-            # Track processing time
-            processing_time = time.time() - start_time
-            self.ml_processing_times.append(processing_time)
+            # Get priority based on ML classification
+            priority = self.get_priority_from_ml_classification(traffic_class, confidence)
+            if signature is not None:
+                self.remember_decision(signature, (traffic_class, confidence, priority))
             
-            self.classification_successes += 1
+            # Log classification result
+            if seq % 50 == 0:  # Log every 50th classification
+                self.logger.info(f"ML Classification: {traffic_class} (conf: {confidence:.3f}, priority: {priority}) - {method}")
             
-            return predicted_class, confidence, f'ML prediction (confidence: {confidence:.3f})'
+            match = datapath.ofproto_parser.OFPMatch(in_port=in_port, eth_dst=dst, eth_src=src)
+            self.add_flow(datapath, priority, match, actions)
+        
+        # Periodic performance reporting (whenever a batch crosses a multiple of 200)
+        if self.classification_count // 200 > seen_before // 200:
+            success_rate = (self.classification_successes / self.classification_count) * 100
+            avg_processing_time = (self._mpt_sum / len(self.ml_processing_times)) if self.ml_processing_times else 0
+            avg_batch_size = self.classification_count / self.batch_count
             
-        except Exception as e:
-            self.logger.error(f"ML classification error: {e}")
-            return 'unknown', 0.1, f'ML error: {str(e)}'
+            self.logger.info(f"ML Performance: {success_rate:.1f}% success rate, {avg_processing_time*1000:.2f}ms avg processing time ({self.classification_count} total classifications, {avg_batch_size:.1f} avg batch size)")
 
-    def fallback_classify_traffic(self, pkt, raw_features):
+    def remember_decision(self, signature, decision):
+        """Cache a (class, confidence, priority) decision, evicting the least recently used"""
+        self._decision_cache[signature] = decision
+        self._decision_cache.move_to_end(signature)
+        if len(self._decision_cache) > self.DECISION_CACHE_SIZE:
+            self._decision_cache.popitem(last=False)
+
+    def refresh_flow_decisions(self):
+        """Re-score every active flow in one GPU batch and refresh the cached decisions"""
+        flows = [flow_stat for flow_stat in self.flow_stats.values()
+                 if flow_signature(flow_stat.last_headers) is not None]
+        if not flows or self._sel_mean is None:
+            return
+        
+        # Rebuild each flow's features as of its latest packet
+        raw = np.zeros((len(flows), len(MODEL_FEATURES)), dtype=np.float32)
+        for row, flow_stat in zip(raw, flows):
+            write_flow_features(row, flow_stat.last_headers, flow_stat.last_length,
+                                flow_stat, flow_stat.last_packet_time)
+        scaled = np.empty((len(flows), len(self._sel_idx)), dtype=np.float32)
+        standardize_select(raw, self._sel_mean, self._sel_scale, self._sel_idx, scaled)
+        
+        # Same feature space as the per-packet path: binned models see bin indices
+        if self.feature_bins is not None:
+            quantized = self.quantize_features(scaled, np.empty(scaled.shape, dtype=np.uint8))
+            scaled = quantized.astype(np.float32)
+        
+        proba = self.fil.predict_proba(scaled)
+        proba = proba.get() if hasattr(proba, 'get') else np.asarray(proba)  # CuPy -> host
+        proba = proba.reshape(len(flows), -1)
+        predictions = proba.argmax(axis=1)
+        
+        for flow_stat, prediction, confidence in zip(flows, predictions, proba[np.arange(len(flows)), predictions]):
+            if confidence < 0.3:
+                continue  # per-packet path would use the port fallback here
+            traffic_class = self.class_names[prediction]
+            priority = self.get_priority_from_ml_classification(traffic_class, float(confidence))
+            self.remember_decision(flow_signature(flow_stat.last_headers),
+                                   (traffic_class, float(confidence), priority))
+
+    def _refresh_loop(self):
+        while True:
+            hub.sleep(self.FLOW_REFRESH_INTERVAL)
+            try:
+                self.refresh_flow_decisions()
+            except Exception as e:
+                self.logger.error(f"Flow refresh error: {e}")
+
+    def _batch_loop(self):
+        while True:
+            hub.sleep(self.BATCH_INTERVAL)
+            if self._pending:
+                self.classify_pending()
+
+    def fallback_classify_traffic(self, src_port, dst_port):
         """Fallback classification when ML fails"""
         # Basic port-based classification as fallback
-        src_port = raw_features.get('src_port', 0)
-        dst_port = raw_features.get('dst_port', 0)
-        
         # Web traffic
         if dst_port in [80, 443, 8080, 8443] or src_port in [80, 443, 8080, 8443]:
             return 'Browsing', 0.7, 'Port-based fallback'
@@ -288,37 +797,12 @@ class MLEnhancedController(app_manager.RyuApp):
 
     def get_priority_from_ml_classification(self, traffic_class, confidence):
         """Convert ML classification to OpenFlow priority"""
-        
-        # High priority traffic types
-        high_priority_classes = [
-            'DNS', 'VOIP', 'Video-Streaming', 'Audio-Streaming', 'Chat'
-        ]
-        
-        # Medium priority traffic types  
-        medium_priority_classes = [
-            'Browsing', 'Email', 'SSH'
-        ]
-        
-        # Low priority traffic types
-        low_priority_classes = [
-            'File-Transfer', 'P2P', 'Bulk'
-        ]
-        
-        base_priority = 1000  # Default
-        
-        if traffic_class in high_priority_classes:
-            base_priority = 3000
-        elif traffic_class in medium_priority_classes:
-            base_priority = 2000
-        elif traffic_class in low_priority_classes:
-            base_priority = 1000
+        base_priority = self.BASE_PRIORITY.get(traffic_class, 1000)
         
         # Confidence boost (higher confidence gets priority boost)
         confidence_boost = int(confidence * 500)  # Max 500 boost
         
-        final_priority = min(base_priority + confidence_boost, 3500)
-        
-        return final_priority
+        return min(base_priority + confidence_boost, 3500)
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def packet_in_handler(self, ev):
@@ -328,14 +812,14 @@ class MLEnhancedController(app_manager.RyuApp):
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        frame = msg.data
+        dst_mac, src_mac, ethertype = ETH_HEADER.unpack_from(frame, 0)
 
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
+        if ethertype == ether_types.ETH_TYPE_LLDP:
             return
 
-        dst = eth.dst
-        src = eth.src
+        dst = addrconv.mac.bin_to_text(dst_mac)
+        src = addrconv.mac.bin_to_text(src_mac)
         dpid = datapath.id
 
         self.mac_to_port.setdefault(dpid, {})
@@ -350,31 +834,35 @@ class MLEnhancedController(app_manager.RyuApp):
 
         # ML-based traffic classification
         if out_port != ofproto.OFPP_FLOOD:
-            # Extract features
-            raw_features = self.extract_flow_features(pkt, in_port, src, dst)
-            
-            # ML classification
-            traffic_class, confidence, method = self.ml_classify_traffic(pkt, raw_features)
+            now_ns = time.monotonic_ns()  # one clock read per packet-in
+            flow_key = src_mac + dst_mac  # raw 12-byte MAC pair, no string formatting
+            headers = parse_headers(frame, ethertype)
+            signature = flow_signature(headers)
+            decision = None
+            if signature is not None:
+                # Well-known service port first, then a cached earlier decision
+                decision = self._fast_path.get(headers[4]) or self._fast_path.get(headers[3])
+                if decision is None:
+                    decision = self._decision_cache.get(signature)
+                    if decision is not None:
+                        self._decision_cache.move_to_end(signature)
             
-            # Fallback if ML classification has low confidence
-            if confidence < 0.3:
-                traffic_class, confidence, method = self.fallback_classify_traffic(pkt, raw_features)
-                method = f"Fallback after ML: {method}"
-            
-            # Get priority based on ML classification
-            priority = self.get_priority_from_ml_classification(traffic_class, confidence)
-            
-            # Log classification result
-            if self.classification_count % 50 == 0:  # Log every 50th classification
-                self.logger.info(f"ML Classification: {traffic_class} (conf: {confidence:.3f}, priority: {priority}) - {method}")
-            
-            match = parser.OFPMatch(in_port=in_port, eth_dst=dst, eth_src=src)
-            
-            if msg.buffer_id != ofproto.OFP_NO_BUFFER:
-                self.add_flow(datapath, priority, match, actions, msg.buffer_id)
-                return
+            if decision is not None:
+                # Priority is already known: skip ML and only keep the flow's
+                # counters current
+                self.update_flow_stats(flow_key, len(frame), now_ns, headers)
+                match = parser.OFPMatch(in_port=in_port, eth_dst=dst, eth_src=src)
+                self.add_flow(datapath, decision[2], match, actions)
             else:
-                self.add_flow(datapath, priority, match, actions)
+                # Extract features straight into this flow's row of the batch buffer
+                self.extract_flow_features(headers, len(frame), flow_key,
+                                           self._feat_buf[len(self._pending)], now_ns)
+                
+                # Queue for batched ML classification; the flow entry is installed
+                # once the batch runs, so this packet always goes out as a PacketOut
+                self._pending.append((datapath, in_port, src, dst, actions, signature))
+                if len(self._pending) >= self.BATCH_MAX:
+                    self.classify_pending()
 
         data = None
         if msg.buffer_id == ofproto.OFP_NO_BUFFER:
@@ -382,11 +870,4 @@ class MLEnhancedController(app_manager.RyuApp):
 
         out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
                                 in_port=in_port, actions=actions, data=data)
-        datapath.send_msg(out)
-        
-        # Periodic performance reporting
-        if self.classification_count > 0 and self.classification_count % 200 == 0:
-            success_rate = (self.classification_successes / self.classification_count) * 100
-            avg_processing_time = np.mean(self.ml_processing_times) if self.ml_processing_times else 0
-            
-            self.logger.info(f"ML Performance: {success_rate:.1f}% success rate, {avg_processing_time*1000:.2f}ms avg processing time ({self.classification_count} total classifications)")
\ No newline at end of file
+        self.queue_msg(datapath, out)
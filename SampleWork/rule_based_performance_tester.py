@@ -10,16 +10,98 @@ import subprocess
 import time
 import json
 import csv
+import io
+import itertools
 import os
 import signal
+import socket
 import sys
 import re
+from array import array
 from datetime import datetime
+from operator import itemgetter
 from mininet.net import Mininet
 from mininet.node import RemoteController, OVSSwitch
 from mininet.link import TCLink
 from mininet.log import setLogLevel, info
 from mininet.topo import Topo
+import numpy as np
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # orjson is optional; stdlib json writes the same files
+    _json_loads = json.loads
+    
+    def _json_dumps(obj):
+        return json.dumps(obj, indent=2).encode()
+
+# Traffic tools started on the hosts, killed in one pkill per host. Anchored to
+# the start of the command line so e.g. "enhanced_rule_controller" never matches "nc"
+_KILL_PATTERNS = r'^(iperf3?|nc|curl|python3 -m http\.server)( |$)'
+
+_CLASS_COLS = itemgetter('traffic_type', 'expected_classification', 'classification_method', 'should_work_encrypted')
+_LATENCY_COLS = itemgetter('src', 'dst', 'avg_latency_ms', 'min_latency_ms', 'max_latency_ms', 'jitter_ms', 'packet_loss_percent')
+_THROUGHPUT_COLS = itemgetter('scenario', 'port', 'throughput_mbps', 'efficiency_percent', 'raw_efficiency_percent', 'actual_duration')
+
+LATENCY_COLUMNS = ('avg_latency_ms', 'jitter_ms', 'packet_loss_percent')
+
+THROUGHPUT_SCENARIOS = [
+    {'name': 'web_traffic', 'port': 8080, 'duration': 10},
+    {'name': 'bulk_transfer', 'port': 9999, 'duration': 15},
+    {'name': 'mixed_traffic', 'port': 7777, 'duration': 10}
+]
+
+# CSV header and row extractor per test
+_CSV_SCHEMAS = {
+    'rule_classification_effectiveness': (['traffic_type', 'expected_classification', 'classification_method', 'should_work_encrypted'], _CLASS_COLS),
+    'baseline_latency': (['src', 'dst', 'avg_latency_ms', 'min_latency_ms', 'max_latency_ms', 'jitter_ms', 'packet_loss_percent'], _LATENCY_COLS),
+    'throughput_performance': (['scenario', 'port', 'throughput_mbps', 'efficiency_percent', 'raw_efficiency_percent', 'duration_sec'], _THROUGHPUT_COLS),
+}
+
+# In-namespace RTT probe: argv is count, spacing_sec, dst_ip...; prints one
+# "loss min avg max" (ms) line per destination
+ICMP_PROBE = """
+import os, socket, struct, sys, time
+
+def checksum(data):
+    total = sum(struct.unpack('!%dH' % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+count, spacing, dsts = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3:]
+ident = os.getpid() & 0xFFFF
+sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+sock.settimeout(1.0)
+
+for dst in dsts:
+    rtts = []
+    for seq in range(count):
+        header = struct.pack('!BBHHH', 8, 0, 0, ident, seq) + bytes(8)
+        packet = struct.pack('!BBHHH', 8, 0, checksum(header), ident, seq) + bytes(8)
+        sent = time.perf_counter_ns()
+        sock.sendto(packet, (dst, 0))
+        try:
+            while True:
+                reply, addr = sock.recvfrom(1024)
+                icmp = reply[(reply[0] & 0x0F) * 4:]
+                if addr[0] == dst and icmp[0] == 0 and struct.unpack('!HH', icmp[4:8]) == (ident, seq):
+                    rtts.append((time.perf_counter_ns() - sent) / 1e6)
+                    break
+        except socket.timeout:
+            pass
+        time.sleep(spacing)
+    
+    loss = 100 * (count - len(rtts)) // count
+    if rtts:
+        print(loss, min(rtts), sum(rtts) / len(rtts), max(rtts), flush=True)
+    else:
+        print(loss, 0.0, 0.0, 0.0, flush=True)
+"""
 
 class SimpleStarTopo(Topo):
     """Simple star topology for testing"""
@@ -31,11 +113,33 @@ class SimpleStarTopo(Topo):
             self.addLink(host, switch, bw=100, delay='1ms')
 
 class RuleBasedPerformanceTester:
+    _HOSTS = tuple(f'h{i}' for i in range(1, 6))
+    # Loss and the rtt summary from one ping run, matched in a single pass
+    _PING_RE = re.compile(r'''
+        (\d+)%\ packet\ loss            # loss percent
+        .*?
+        rtt\ min/avg/max/mdev\ =\ 
+        ([\d.]+)/([\d.]+)/([\d.]+)/   # min / avg / max in ms
+    ''', re.DOTALL | re.VERBOSE)
+    
     def __init__(self):
         self.controller_process = None
         self.net = None
         self.results_dir = "rule_based_results"
         self.test_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.host_by_name = {}
+        self.ip_by_name = {}
+        # Raw-socket probe: 10 echoes 10 ms apart instead of ping's 1 s cadence. Off by
+        # default so baseline latency stays comparable with the ML tester's ping runs
+        self.use_icmp_probe = False
+        # Run the throughput scenarios' clients side by side (wall time = longest scenario).
+        # Off by default: concurrent streams share the h1-h2 link, so per-scenario Mbps drop
+        self.concurrent_throughput = False
+        # Float32 columns of the baseline latency results, for the summary statistics
+        self.latency_columns = {}
+        # Same CPU split as the ML tester, so both controllers are measured under one scheduler setup
+        self.ctrl_cpus = {0}
+        self.mn_cpus = {2, 4, 6}
         self.setup_directories()
         
     def setup_directories(self):
@@ -47,15 +151,23 @@ class RuleBasedPerformanceTester:
     def start_controller(self):
         """Start enhanced rule-based controller"""
         info("Starting Enhanced Rule-Based SDN controller...\n")
-        controller_log = open(f"{self.results_dir}/logs/rule_controller_{self.test_timestamp}.log", 'w')
-        
-        self.controller_process = subprocess.Popen(
-            ['ryu-manager', 'enhanced_rule_controller.py', '--verbose'],
-            stdout=controller_log,
-            stderr=controller_log
-        )
-        
-        time.sleep(3)
+        # The controller writes its log straight to the file; the tester keeps no handle or pipe to drain
+        with open(f"{self.results_dir}/logs/rule_controller_{self.test_timestamp}.log", 'w') as controller_log:
+            self.controller_process = subprocess.Popen(
+                ['ryu-manager', 'enhanced_rule_controller.py', '--verbose'],
+                stdout=controller_log,
+                stderr=controller_log
+            )
+        self.pin_controller()
+        
+        # Ready once the OpenFlow port accepts connections (or the process died)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and self.controller_process.poll() is None:
+            try:
+                socket.create_connection(('127.0.0.1', 6633), 0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
         
         if self.controller_process.poll() is None:
             info("Rule-based controller started successfully\n")
@@ -64,6 +176,37 @@ class RuleBasedPerformanceTester:
             info("Failed to start rule-based controller\n")
             return False
     
+    def pin_controller(self):
+        """Pin the controller to its dedicated core and raise its scheduling priority"""
+        pid = self.controller_process.pid
+        try:
+            os.sched_setaffinity(pid, self.ctrl_cpus)
+            info(f"Controller pinned to CPU {sorted(self.ctrl_cpus)}\n")
+        except (AttributeError, OSError) as e:
+            info(f"Could not pin controller to CPU {sorted(self.ctrl_cpus)}: {e}\n")
+        
+        try:
+            os.setpriority(os.PRIO_PROCESS, pid, -5)  # requires CAP_SYS_NICE
+        except (AttributeError, OSError) as e:
+            info(f"Could not raise controller priority: {e}\n")
+    
+    def pin_hosts(self):
+        """Pin the host shells and this tester to the Mininet cores, away from the controller"""
+        cpus = self.mn_cpus & os.sched_getaffinity(0)
+        if not cpus:
+            info(f"None of the Mininet CPUs {sorted(self.mn_cpus)} are available, hosts not pinned\n")
+            return
+        
+        # Tools started with host.popen() inherit this process's affinity, not the shell's
+        os.sched_setaffinity(0, cpus)
+        
+        for host in self.net.hosts:
+            try:
+                os.sched_setaffinity(host.pid, cpus)
+            except OSError as e:
+                info(f"Could not pin {host.name}: {e}\n")
+        info(f"Mininet hosts pinned to CPUs {sorted(cpus)}\n")
+    
     def start_network(self):
         """Start Mininet network"""
         info("Starting network topology...\n")
@@ -79,7 +222,9 @@ class RuleBasedPerformanceTester:
         )
         
         self.net.start()
-        time.sleep(2)
+        self.host_by_name = {host.name: host for host in self.net.hosts}
+        self.ip_by_name = {host.name: host.IP() for host in self.net.hosts}
+        self.pin_hosts()
         info("Network started successfully\n")
         return True
     
@@ -96,15 +241,11 @@ class RuleBasedPerformanceTester:
         
         info("Generating different traffic types for classification testing...\n")
         
-        h1, h2 = self.net.get('h1', 'h2')
+        h1, h2 = self.host_by_name['h1'], self.host_by_name['h2']
         
         # Test 1: Web traffic
         info("  Testing web traffic classification...\n")
-        h2.cmd('timeout 5 python3 -m http.server 8080 > /dev/null 2>&1 &')
-        time.sleep(1)
-        h1.cmd('timeout 3 curl -s http://10.0.0.2:8080/ > /dev/null 2>&1 || true')
-        h2.cmd('pkill -f "python3.*8080" || true')
-        time.sleep(1)
+        self._probe_port(h2, h1, 8080, 'timeout 3 curl -s http://10.0.0.2:8080/ > /dev/null 2>&1 || true')
         
         results['results'].append({
             'traffic_type': 'web_browsing',
@@ -156,19 +297,38 @@ class RuleBasedPerformanceTester:
             'results': []
         }
         
-        hosts = ['h1', 'h2', 'h3', 'h4', 'h5']
+        self.latency_columns = {key: array('f') for key in LATENCY_COLUMNS}
         
-        for i, src_name in enumerate(hosts):
-            for dst_name in hosts[i+1:]:
-                src = self.net.get(src_name)
-                dst_ip = f"10.0.0.{dst_name[1]}"
-                
-                ping_result = src.cmd(f'ping -c 10 -W 1 {dst_ip}')
-                
-                packet_loss = self.parse_packet_loss(ping_result)
-                avg_latency = self.parse_avg_latency(ping_result)
-                min_latency = self.parse_min_latency(ping_result)
-                max_latency = self.parse_max_latency(ping_result)
+        # Start every probe at once, then collect them in pair order. The ICMP probe
+        # runs one process per source host covering all of its destinations
+        pairs = itertools.combinations(self._HOSTS, 2)
+        if self.use_icmp_probe:
+            groups = [(src_name, [dst_name for _, dst_name in group])
+                      for src_name, group in itertools.groupby(pairs, key=itemgetter(0))]
+        else:
+            groups = [(src_name, [dst_name]) for src_name, dst_name in pairs]
+        
+        probes = []
+        for src_name, dst_names in groups:
+            dst_ips = [self.ip_by_name[dst_name] for dst_name in dst_names]
+            if self.use_icmp_probe:
+                argv = ['python3', '-c', ICMP_PROBE, '10', '0.01'] + dst_ips
+            else:
+                argv = ['ping', '-c', '10', '-W', '1'] + dst_ips
+            proc = self.host_by_name[src_name].popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                                     universal_newlines=True)
+            probes.append((src_name, dst_names, proc))
+        
+        parse = self.parse_probe if self.use_icmp_probe else self.parse_ping
+        for src_name, dst_names, proc in probes:
+            output = proc.communicate()[0]
+            # The probe prints one line per destination; ping's whole output is one report
+            reports = output.splitlines() if self.use_icmp_probe else [output]
+            reports += [''] * (len(dst_names) - len(reports))
+            
+            for dst_name, report in zip(dst_names, reports):
+                dst_ip = self.ip_by_name[dst_name]
+                packet_loss, min_latency, avg_latency, max_latency = parse(report)
                 jitter = max_latency - min_latency if max_latency > 0 and min_latency > 0 else 0
                 
                 test_result = {
@@ -183,6 +343,8 @@ class RuleBasedPerformanceTester:
                 }
                 
                 results['results'].append(test_result)
+                for key, column in self.latency_columns.items():
+                    column.append(test_result[key])
                 
                 status = "✓" if packet_loss < 10 else "✗"
                 info(f"{status} {src_name} -> {dst_name}: {avg_latency:.2f}ms avg, {jitter:.2f}ms jitter, {packet_loss}% loss\n")
@@ -201,33 +363,22 @@ class RuleBasedPerformanceTester:
             'results': []
         }
         
-        test_scenarios = [
-            {'name': 'web_traffic', 'port': 8080, 'duration': 10},
-            {'name': 'bulk_transfer', 'port': 9999, 'duration': 15},
-            {'name': 'mixed_traffic', 'port': 7777, 'duration': 10}
-        ]
+        h1 = self.host_by_name['h1']
+        h2 = self.host_by_name['h2']
         
-        for scenario in test_scenarios:
-            info(f"Testing {scenario['name']} throughput...\n")
-            
-            h1 = self.net.get('h1')
-            h2 = self.net.get('h2')
-            
-            h2.cmd(f'iperf -s -p {scenario["port"]} > /tmp/iperf_server_{scenario["port"]}.log 2>&1 &')
-            time.sleep(2)
-            
-            start_time = time.time()
-            iperf_result = h1.cmd(f'iperf -c 10.0.0.2 -p {scenario["port"]} -t {scenario["duration"]} -i 1')
-            end_time = time.time()
-            
-            throughput_mbps = self.parse_iperf_throughput(iperf_result)
-            actual_duration = end_time - start_time
-            
-            h2.cmd(f'pkill -f "iperf.*{scenario["port"]}" || true')
-            time.sleep(1)
+        # One iperf3 daemon per scenario port for the whole test; the port is what the
+        # rules classify. They hold 8080, so they must not outlive this test
+        for scenario in THROUGHPUT_SCENARIOS:
+            h2.cmd(f'iperf3 -s -D -p {scenario["port"]} --logfile /tmp/iperf3_{scenario["port"]}.log')
+        for scenario in THROUGHPUT_SCENARIOS:
+            self.wait_port(h2, scenario['port'], timeout=2.0)
+        
+        for scenario, iperf_result, actual_duration in self._run_iperf_clients(h1, h2):
+            throughput_mbps = self.parse_iperf_json(iperf_result)
             
-            raw_efficiency = (throughput_mbps / 100.0) * 100 if throughput_mbps > 0 else 0
-            efficiency = min(raw_efficiency, 100.0)
+            # On the 100 Mbps links, Mbps is already percent of capacity
+            raw_efficiency = throughput_mbps
+            efficiency = raw_efficiency if raw_efficiency < 100.0 else 100.0
             
             test_result = {
                 'scenario': scenario['name'],
@@ -237,12 +388,14 @@ class RuleBasedPerformanceTester:
                 'actual_duration': actual_duration,
                 'efficiency_percent': efficiency,
                 'raw_efficiency_percent': raw_efficiency,
-                'link_utilization': 'Saturated' if throughput_mbps > 95 else 'Normal'
+                'link_utilization': 'Saturated' if throughput_mbps > 95.0 else 'Normal'
             }
             
             results['results'].append(test_result)
             info(f"✓ {scenario['name']}: {throughput_mbps:.2f} Mbps ({efficiency:.1f}% efficiency, {raw_efficiency:.1f}% raw)\n")
         
+        h2.cmd("pkill -f '^iperf3 -s -D ' || true")
+        
         self.save_results('throughput_performance', results)
         return results
     
@@ -259,12 +412,11 @@ class RuleBasedPerformanceTester:
         
         info("Running basic response time tests...\n")
         
-        h1, h2 = self.net.get('h1', 'h2')
+        h1, h2 = self.host_by_name['h1'], self.host_by_name['h2']
         
         for i in range(3):
-            start_time = time.time()
             result = h1.cmd('ping -c 1 10.0.0.2')
-            response_time = self.parse_avg_latency(result)
+            response_time = self.parse_ping(result)[2]
             
             test_result = {
                 'traffic_type': f'basic_test_{i+1}',
@@ -282,108 +434,135 @@ class RuleBasedPerformanceTester:
         self.save_results('qos_under_load', results)
         return results
     
-    def parse_packet_loss(self, ping_output):
-        match = re.search(r'(\d+)% packet loss', ping_output)
-        return int(match.group(1)) if match else 100
+    def wait_port(self, host, port, timeout=1.0):
+        # Poll inside the host for a listening socket: no connection, so no flow through the switch
+        tries = max(1, int(timeout / 0.02))
+        output = host.cmd(f'for i in $(seq {tries}); do ss -Hltn "sport = :{port}" | grep -q . && echo ready && break; sleep 0.02; done')
+        if 'ready' not in output:
+            info(f"  Port {port} on {host.name} not listening after {timeout:.1f}s\n")
+            return False
+        return True
+    
+    def _probe_port(self, h_server, h_client, port, cmd_client):
+        """Serve HTTP on h_server for the duration of one client command"""
+        server = h_server.popen(['timeout', '5', 'python3', '-m', 'http.server', str(port)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            self.wait_port(h_server, port)
+            if server.poll() is not None:
+                info(f"  HTTP server on {h_server.name}:{port} exited early (port already in use?)\n")
+            return h_client.cmd(cmd_client)
+        finally:
+            server.terminate()
+            server.wait()
     
-    def parse_avg_latency(self, ping_output):
-        match = re.search(r'rtt min/avg/max/mdev = [\d.]+/([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
+    def _run_iperf_clients(self, h1, h2):
+        """Yield (scenario, iperf3 JSON, duration) for each throughput scenario"""
+        def launch(scenario):
+            return h1.popen(['iperf3', '-c', '10.0.0.2', '-p', str(scenario['port']),
+                             '-t', str(scenario['duration']), '-J'],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        
+        if not self.concurrent_throughput:
+            for scenario in THROUGHPUT_SCENARIOS:
+                info(f"Testing {scenario['name']} throughput...\n")
+                self._warmup(h1, h2)
+                start_time = time.perf_counter()
+                output = launch(scenario).communicate()[0]
+                yield scenario, output, time.perf_counter() - start_time
+            return
+        
+        info(f"Testing {len(THROUGHPUT_SCENARIOS)} throughput scenarios concurrently...\n")
+        self._warmup(h1, h2)
+        start_time = time.perf_counter()
+        clients = [(scenario, launch(scenario)) for scenario in THROUGHPUT_SCENARIOS]
+        # Collect shortest first so each elapsed time is close to that client's own finish
+        for scenario, client in sorted(clients, key=lambda pair: pair[0]['duration']):
+            output = client.communicate()[0]
+            yield scenario, output, time.perf_counter() - start_time
     
-    def parse_min_latency(self, ping_output):
-        match = re.search(r'rtt min/avg/max/mdev = ([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
+    def _warmup(self, src, dst):
+        # One throwaway ping so flow setup in the controller happens before the timed window
+        src.cmd(f'ping -c 1 -W 1 {dst.IP()} > /dev/null 2>&1')
     
-    def parse_max_latency(self, ping_output):
-        match = re.search(r'rtt min/avg/max/mdev = [\d.]+/[\d.]+/([\d.]+)/', ping_output)
-        return float(match.group(1)) if match else 0.0
+    def parse_ping(self, ping_output):
+        # No rtt line means nothing came back: report full loss
+        match = self._PING_RE.search(ping_output)
+        if not match:
+            return 100, 0.0, 0.0, 0.0
+        loss, min_latency, avg_latency, max_latency = match.groups()
+        return int(loss), float(min_latency), float(avg_latency), float(max_latency)
     
-    def parse_iperf_throughput(self, iperf_output):
-        lines = iperf_output.split('\n')
-        for line in reversed(lines):
-            if 'Mbits/sec' in line and 'sec' in line:
-                match = re.search(r'([\d.]+)\s+Mbits/sec', line)
-                if match:
-                    return float(match.group(1))
-        return 0.0
+    def parse_probe(self, probe_output):
+        # ICMP_PROBE prints one "loss min avg max" line
+        fields = probe_output.split()
+        if len(fields) != 4:
+            return 100, 0.0, 0.0, 0.0
+        return int(fields[0]), float(fields[1]), float(fields[2]), float(fields[3])
+    
+    def parse_iperf_json(self, iperf_output):
+        # iperf3 -J report; a failed run carries an "error" key instead of "end"
+        try:
+            return _json_loads(iperf_output)['end']['sum_received']['bits_per_second'] / 1e6
+        except (ValueError, KeyError, TypeError):
+            return 0.0
     
     def save_results(self, test_name, results):
         timestamp = self.test_timestamp
         
         json_file = f"{self.results_dir}/{test_name}_{timestamp}.json"
-        with open(json_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        with open(json_file, 'wb') as f:
+            f.write(_json_dumps(results))
         
-        csv_file = f"{self.results_dir}/{test_name}_{timestamp}.csv"
+        if test_name not in _CSV_SCHEMAS:
+            return
         
-        if test_name == 'rule_classification_effectiveness':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['traffic_type', 'expected_classification', 'classification_method', 'should_work_encrypted'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['traffic_type'], result['expected_classification'],
-                        result['classification_method'], result['should_work_encrypted']
-                    ])
-        
-        elif test_name == 'baseline_latency':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['src', 'dst', 'avg_latency_ms', 'min_latency_ms', 'max_latency_ms', 'jitter_ms', 'packet_loss_percent'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['src'], result['dst'], result['avg_latency_ms'],
-                        result['min_latency_ms'], result['max_latency_ms'],
-                        result['jitter_ms'], result['packet_loss_percent']
-                    ])
-        
-        elif test_name == 'throughput_performance':
-            with open(csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['scenario', 'port', 'throughput_mbps', 'efficiency_percent', 'raw_efficiency_percent', 'duration_sec'])
-                for result in results['results']:
-                    writer.writerow([
-                        result['scenario'], result['port'], result['throughput_mbps'],
-                        result['efficiency_percent'], result['raw_efficiency_percent'], result['actual_duration']
-                    ])
+        header, columns = _CSV_SCHEMAS[test_name]
+        csv_file = f"{self.results_dir}/{test_name}_{timestamp}.csv"
+        with open(csv_file, 'w', newline='', buffering=1 << 16) as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(columns(result) for result in results['results'])
     
     def generate_performance_summary(self, all_results):
         info("Generating performance summary report...\n")
         
         summary_file = f"{self.results_dir}/rule_based_performance_summary_{self.test_timestamp}.txt"
         
-        with open(summary_file, 'w') as f:
-            f.write("=== RULE-BASED SDN CONTROLLER PERFORMANCE SUMMARY ===\n")
-            f.write(f"Test Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Test ID: {self.test_timestamp}\n")
-            f.write("Controller: Enhanced Rule-Based with DPI + Port + Statistical Classification\n\n")
-            
-            if 'rule_classification_effectiveness' in all_results:
-                class_data = all_results['rule_classification_effectiveness']['results']
-                f.write("--- CLASSIFICATION METHOD EFFECTIVENESS ---\n")
-                f.write(f"Traffic types tested: {len(class_data)}\n")
-                for result in class_data:
-                    encrypted_note = "Works on encrypted" if result['should_work_encrypted'] else "Fails on encrypted"
-                    f.write(f"• {result['traffic_type']}: {result['classification_method']} - {encrypted_note}\n")
-                f.write("\n")
-            
-            if 'baseline_latency' in all_results:
-                latency_data = all_results['baseline_latency']['results']
-                avg_latencies = [r['avg_latency_ms'] for r in latency_data]
-                avg_jitters = [r['jitter_ms'] for r in latency_data]
-                packet_losses = [r['packet_loss_percent'] for r in latency_data]
-                
-                f.write("--- LATENCY PERFORMANCE ---\n")
-                f.write(f"Average Latency: {sum(avg_latencies)/len(avg_latencies):.2f} ms\n")
-                f.write(f"Average Jitter: {sum(avg_jitters)/len(avg_jitters):.2f} ms\n")
-                f.write(f"Average Packet Loss: {sum(packet_losses)/len(packet_losses):.2f}%\n\n")
+        # Assemble in memory and write the file in one call
+        buf = io.StringIO()
+        buf.write("=== RULE-BASED SDN CONTROLLER PERFORMANCE SUMMARY ===\n")
+        buf.write(f"Test Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        buf.write(f"Test ID: {self.test_timestamp}\n")
+        buf.write("Controller: Enhanced Rule-Based with DPI + Port + Statistical Classification\n\n")
+        
+        if 'rule_classification_effectiveness' in all_results:
+            class_data = all_results['rule_classification_effectiveness']['results']
+            buf.write("--- CLASSIFICATION METHOD EFFECTIVENESS ---\n")
+            buf.write(f"Traffic types tested: {len(class_data)}\n")
+            for result in class_data:
+                encrypted_note = "Works on encrypted" if result['should_work_encrypted'] else "Fails on encrypted"
+                buf.write(f"• {result['traffic_type']}: {result['classification_method']} - {encrypted_note}\n")
+            buf.write("\n")
+        
+        if 'baseline_latency' in all_results:
+            avg_latency, avg_jitter, avg_loss = (
+                np.frombuffer(self.latency_columns[key], dtype=np.float32).mean() for key in LATENCY_COLUMNS)
             
-            if 'throughput_performance' in all_results:
-                throughput_data = all_results['throughput_performance']['results']
-                f.write("--- THROUGHPUT PERFORMANCE ---\n")
-                for result in throughput_data:
-                    f.write(f"{result['scenario']}: {result['throughput_mbps']:.2f} Mbps ({result['efficiency_percent']:.1f}% efficiency)\n")
-                f.write("\n")
+            buf.write("--- LATENCY PERFORMANCE ---\n")
+            buf.write(f"Average Latency: {avg_latency:.2f} ms\n")
+            buf.write(f"Average Jitter: {avg_jitter:.2f} ms\n")
+            buf.write(f"Average Packet Loss: {avg_loss:.2f}%\n\n")
+        
+        if 'throughput_performance' in all_results:
+            throughput_data = all_results['throughput_performance']['results']
+            buf.write("--- THROUGHPUT PERFORMANCE ---\n")
+            for result in throughput_data:
+                buf.write(f"{result['scenario']}: {result['throughput_mbps']:.2f} Mbps ({result['efficiency_percent']:.1f}% efficiency)\n")
+            buf.write("\n")
+        
+        with open(summary_file, 'w') as f:
+            f.write(buf.getvalue())
         
         info(f"Performance summary saved: {summary_file}\n")
     
@@ -392,9 +571,7 @@ class RuleBasedPerformanceTester:
         
         if self.net:
             for host in self.net.hosts:
-                host.cmd('pkill -f iperf || true')
-                host.cmd('pkill -f nc || true')
-                host.cmd('pkill -f python3 || true')
+                host.cmd(f"pkill -f '{_KILL_PATTERNS}' || true")
             self.net.stop()
         
         if self.controller_process:
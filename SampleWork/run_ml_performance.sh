@@ -35,6 +35,12 @@ if ! command -v mn &> /dev/null; then
     exit 1
 fi
 
+if ! command -v iperf3 &> /dev/null; then
+    echo -e "${RED}iperf3 not found!${NC}"
+    echo "Install with: sudo apt install iperf3"
+    exit 1
+fi
+
 if [ ! -f "ml_enhanced_controller.py" ]; then
     echo -e "${RED}ml_enhanced_controller.py not found!${NC}"
     echo "Please ensure the ML controller file is in the current directory"
@@ -73,6 +79,7 @@ killall ryu-manager 2>/dev/null || true
 mn -c 2>/dev/null || true
 killall python3 2>/dev/null || true
 killall iperf 2>/dev/null || true
+killall iperf3 2>/dev/null || true
 killall nc 2>/dev/null || true
 
 # Make scripts executable
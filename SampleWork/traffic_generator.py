@@ -13,6 +13,10 @@ from mininet.log import setLogLevel, info
 import time
 import threading
 
+# Traffic tools started on the hosts, killed in one pkill per host. Anchored to
+# the start of the command line so e.g. "enhanced_rule_controller" never matches "nc"
+_KILL_PATTERNS = r'^(iperf3?|nc|curl|python3 -m http\.server)( |$)'
+
 class TestTopo(Topo):
     def __init__(self):
         Topo.__init__(self)
@@ -34,9 +38,7 @@ def generate_unencrypted_traffic(net):
     
     # Generate HTTP requests (unencrypted)
     info("Generating unencrypted HTTP traffic...\n")
-    for i in range(5):
-        result = h1.cmd('curl -s http://10.0.0.2:8080/ > /dev/null')
-        time.sleep(1)
+    h1.cmd('for i in 1 2 3 4 5; do curl -s http://10.0.0.2:8080/ > /dev/null; sleep 1; done')
     
     # Stop server
     h2.cmd('pkill -f "python3 -m http.server"')
@@ -51,10 +53,8 @@ def generate_encrypted_traffic(net):
     
     # Generate HTTPS requests (encrypted - DPI will fail)
     info("Generating encrypted HTTPS traffic...\n")
-    for i in range(5):
-        # Try to connect to external HTTPS (will fail but generate encrypted patterns)
-        h1.cmd('timeout 2 curl -k https://10.0.0.3:443/ > /dev/null 2>&1 || true')
-        time.sleep(1)
+    # Try to connect to external HTTPS (will fail but generate encrypted patterns)
+    h1.cmd('for i in 1 2 3 4 5; do timeout 2 curl -k https://10.0.0.3:443/ > /dev/null 2>&1; sleep 1; done')
     
     info("Encrypted traffic test completed\n")
 
@@ -86,9 +86,7 @@ def generate_various_protocols(net):
     
     # Small packet traffic (control)
     info("Testing small packet traffic...\n")
-    for i in range(10):
-        h1.cmd('ping -c 1 -s 32 10.0.0.4 > /dev/null 2>&1 &')
-        time.sleep(0.5)
+    h1.cmd('ping -c 10 -i 0.5 -s 32 10.0.0.4 > /dev/null 2>&1')
     
     # Cleanup
     for host in [h1, h2, h3, h4]:
@@ -106,9 +104,7 @@ def generate_mixed_traffic(net):
     info("Starting web traffic...\n")
     h2.cmd('python3 -m http.server 8080 &')
     time.sleep(1)
-    for i in range(5):
-        h1.cmd('curl -s http://10.0.0.2:8080/ > /dev/null')
-        time.sleep(0.5)
+    h1.cmd('for i in 1 2 3 4 5; do curl -s http://10.0.0.2:8080/ > /dev/null; sleep 0.5; done')
     h2.cmd('pkill -f "python3 -m http.server" || true')
     
     # Bulk transfer  
@@ -120,9 +116,7 @@ def generate_mixed_traffic(net):
     
     # Ping traffic
     info("Starting ping traffic...\n")
-    for i in range(10):
-        h1.cmd('ping -c 1 10.0.0.3 > /dev/null 2>&1')
-        time.sleep(0.2)
+    h1.cmd('ping -c 10 -i 0.2 10.0.0.3 > /dev/null 2>&1')
     
     info("Mixed traffic test completed\n")
 
@@ -178,9 +172,7 @@ def run_classification_tests():
     finally:
         # Cleanup
         for host in net.hosts:
-            host.cmd('pkill -f python3 || true')
-            host.cmd('pkill -f nc || true')
-            host.cmd('pkill -f curl || true')
+            host.cmd(f"pkill -f '{_KILL_PATTERNS}' || true")
         
         net.stop()
 